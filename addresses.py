@@ -0,0 +1,99 @@
+import re
+import unicodedata
+
+# Region assumed for an address that names no city, state or PIN code
+DEFAULT_CITY = "Kochi"
+DEFAULT_STATE = "Kerala"
+DEFAULT_PIN_CODE = "682025"
+
+# Parts that never narrow a lookup down
+NOISE_PARTS = {"india"}
+# Ernakulam (the district, and the mainland side of the city) is looked up as Kochi
+CITY_ALIASES = {"kochi": "Kochi", "cochin": "Kochi", "kochi city": "Kochi", "ernakulam": "Kochi"}
+STATE_ALIASES = {"kerala": "Kerala", "kerala state": "Kerala"}
+# A city name right after one of these is part of a place name ("Fort Kochi"), not the city
+PLACE_NAME_PREFIXES = {"fort", "old", "new", "north", "south", "east", "west"}
+
+# Indian PIN codes: six digits, never starting with 0, sometimes written "682 025"
+PIN_CODE_PATTERN = re.compile(r"(?<!\d)([1-9]\d{2}) ?(\d{3})(?!\d)")
+PART_SEPARATORS = re.compile(r"\s*[,;|\n]\s*")
+# Zero-width characters dropped, typographic quotes and dashes folded to ASCII
+CHARACTER_FIXES = str.maketrans({
+    "\u200b": None, "\u200c": None, "\u200d": None, "\u2060": None, "\ufeff": None,
+    "\u2018": "'", "\u2019": "'", "\u201c": '"', "\u201d": '"', "\u2013": "-", "\u2014": "-",
+})
+
+
+# --- Canonical Addresses ---
+def canonical_address(address):
+    """Return the one spelling of an address used for provider calls and cache keys.
+
+    Unicode is NFKC-normalized, parts are split on commas, repeated parts and
+    "India" are dropped, city aliases (Cochin, Ernakulam) become Kochi, city
+    and state names trailing a part ("MG Road Kochi") are split off it, and
+    the locality is moved to the end in a fixed order: street/venue parts as
+    written, then city, state and PIN code. An address with no city, state or
+    PIN is pinned to Kochi.
+    """
+    if not address:
+        return ""
+    text = unicodedata.normalize("NFKC", address).translate(CHARACTER_FIXES)
+
+    pin_codes = ["".join(match) for match in PIN_CODE_PATTERN.findall(text)]
+    text = PIN_CODE_PATTERN.sub(" ", text)
+
+    places, seen = [], set()
+    city = state = None
+    for part in PART_SEPARATORS.split(text):
+        part = re.sub(r"\s+", " ", part).strip(" -.")
+        if not part:
+            continue
+        part, locality = _split_locality(part)
+        for tier, name in locality:
+            if tier == "city":
+                city = city or name
+            else:
+                state = state or name
+        folded = part.casefold()
+        if not part or folded in NOISE_PARTS or folded in seen:
+            continue
+        seen.add(folded)
+        places.append(part)
+
+    pin_code = pin_codes[-1] if pin_codes else None
+    if not (city or state or pin_code):
+        city = DEFAULT_CITY
+    if city == DEFAULT_CITY:
+        state = state or DEFAULT_STATE
+        pin_code = pin_code or DEFAULT_PIN_CODE
+    return ", ".join(part for part in places + [city, state, pin_code] if part)
+
+
+def address_key(address):
+    """Cache key for an address: its canonical form, case-folded."""
+    return canonical_address(address).casefold()
+
+
+def _split_locality(part):
+    # "Panampilly Nagar Kochi Kerala" -> ("Panampilly Nagar", [(tier, name), ...]); "Kochi" -> ("", [...]).
+    # Only trailing city/state/noise words are taken, and never a city name that ends a place name
+    words = part.split()
+    locality = []
+    while words:
+        for size in (2, 1):
+            if len(words) < size:
+                continue
+            suffix = " ".join(words[-size:]).casefold()
+            if suffix in NOISE_PARTS:
+                break
+            if suffix in CITY_ALIASES and (len(words) == size or words[-size - 1].casefold() not in PLACE_NAME_PREFIXES):
+                locality.append(("city", CITY_ALIASES[suffix]))
+                break
+            if suffix in STATE_ALIASES:
+                locality.append(("state", STATE_ALIASES[suffix]))
+                break
+        else:
+            break
+        del words[-size:]
+    # Read right to left, so put the names back in the order they were written
+    return " ".join(words), locality[::-1]
@@ -1,17 +1,30 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 import subprocess
 import os
 import json
+import codecs
 import requests
 import tempfile
 import spacy
-from serpapi import GoogleSearch
 from urllib.parse import quote, urlparse, parse_qs
 import re
 import logging
-from pathlib import Path
-import math
+import time
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from storage import open_reel_store, ReelIndex, InvalidCursor, canonical_reel_key, valid_coordinates
+from caching import PersistentTTLCache, normalize_search_query, LOOKUP_CACHE_FILE
+from http_client import http_get, http_post, connection_stats
+from hedging import hedged_call
+from resilience import ProviderGuard, ProviderUnavailable
+from addresses import canonical_address, address_key
+from extraction import (
+    DESCRIPTION_STRATEGIES, EMBED_STRATEGY, DESCRIPTION_HEDGE_DELAY_SECONDS, DESCRIPTION_TIMEOUT_SECONDS,
+    BROWSER_USER_AGENT, EmbedCaptionScanner, StrategyRace, extraction_executor, extract_strategy_description, download_video,
+    extraction_stats, strategy_stats
+)
+from singleflight import SingleFlight, SINGLE_FLIGHT_DIR, SINGLE_FLIGHT_RESULT_TTL_SECONDS
 
 # --- Config - Use Environment Variables for Security ---
 SERPAPI_KEY = os.environ.get("SERPAPI_KEY", "9184855c3a7f4401806ebdc8ba1c35bf169b449c808d6bf9baca859376d1b4e5")
@@ -30,11 +43,100 @@ app = Flask(__name__)
 
 # Database file
 DATABASE_FILE = "data.json"
+SQLITE_DATABASE_FILE = os.environ.get("SQLITE_DATABASE_FILE", "reels.db")
 
-# Initialize database if it doesn't exist
-if not os.path.exists(DATABASE_FILE):
-    with open(DATABASE_FILE, "w") as f:
-        json.dump({"reels": []}, f)
+# Reel store backend: "json" (append-only journal compacted into DATABASE_FILE)
+# or "sqlite" (WAL-mode SQLITE_DATABASE_FILE, seeded once from DATABASE_FILE)
+REEL_STORE_BACKEND = os.environ.get("REEL_STORE_BACKEND", "json")
+reel_store = open_reel_store(REEL_STORE_BACKEND, DATABASE_FILE, SQLITE_DATABASE_FILE)
+
+# Resident copy of the saved reels, refreshed incrementally from reel_store
+reel_index = ReelIndex(reel_store)
+reel_index.refresh()
+
+# Page sizes for /get_nearby_locations?limit=...&cursor=...
+DEFAULT_NEARBY_PAGE_SIZE = 20
+MAX_NEARBY_PAGE_SIZE = 100
+
+# Place search results rarely change, so google_maps_search answers are cached on disk
+# (LOOKUP_CACHE_FILE) by normalized query, with an in-memory LRU in front
+SEARCH_CACHE_TTL_SECONDS = int(os.environ.get("SEARCH_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "20000"))
+search_cache = PersistentTTLCache(LOOKUP_CACHE_FILE, "maps_search", SEARCH_CACHE_TTL_SECONDS, SEARCH_CACHE_MAX_ENTRIES)
+
+# A place_id is a stable identifier, so its Places API record is kept much longer
+PLACE_DETAILS_CACHE_TTL_SECONDS = int(os.environ.get("PLACE_DETAILS_CACHE_TTL_SECONDS", str(90 * 24 * 3600)))
+PLACE_DETAILS_CACHE_MAX_ENTRIES = int(os.environ.get("PLACE_DETAILS_CACHE_MAX_ENTRIES", "50000"))
+place_details_cache = PersistentTTLCache(
+    LOOKUP_CACHE_FILE, "place_details", PLACE_DETAILS_CACHE_TTL_SECONDS, PLACE_DETAILS_CACHE_MAX_ENTRIES
+)
+# Geocoded coordinates for an address, keyed by the normalized address text
+GEOCODE_CACHE_TTL_SECONDS = int(os.environ.get("GEOCODE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+GEOCODE_CACHE_MAX_ENTRIES = int(os.environ.get("GEOCODE_CACHE_MAX_ENTRIES", "50000"))
+geocode_cache = PersistentTTLCache(LOOKUP_CACHE_FILE, "geocode", GEOCODE_CACHE_TTL_SECONDS, GEOCODE_CACHE_MAX_ENTRIES)
+# Batch geocoding: at most this many addresses per request, this many uncached ones geocoded at a time
+MAX_BATCH_GEOCODE_ADDRESSES = 1000
+BATCH_GEOCODE_WORKERS = int(os.environ.get("BATCH_GEOCODE_WORKERS", "8"))
+
+# Concurrent requests for the same reel share one resolution, within and across workers.
+# Server errors are only handed to duplicates already waiting in this worker.
+reel_flights = SingleFlight(
+    SINGLE_FLIGHT_DIR, SINGLE_FLIGHT_RESULT_TTL_SECONDS, shareable=lambda result: result[1] < 500
+)
+
+# Captions of published reels rarely change and are by far the slowest thing to fetch,
+# so they are kept by reel shortcode (a re-resolve or re-parse needs no Instagram round trip)
+CAPTION_CACHE_TTL_SECONDS = int(os.environ.get("CAPTION_CACHE_TTL_SECONDS", str(90 * 24 * 3600)))
+CAPTION_CACHE_MAX_ENTRIES = int(os.environ.get("CAPTION_CACHE_MAX_ENTRIES", "100000"))
+caption_cache = PersistentTTLCache(LOOKUP_CACHE_FILE, "captions", CAPTION_CACHE_TTL_SECONDS, CAPTION_CACHE_MAX_ENTRIES)
+
+# Final /get_location responses, keyed by reel shortcode. A response older than
+# REEL_RESPONSE_FRESH_SECONDS is still served (for up to REEL_RESPONSE_STALE_SECONDS more)
+# while it is refreshed in the background.
+REEL_RESPONSE_FRESH_SECONDS = int(os.environ.get("REEL_RESPONSE_FRESH_SECONDS", str(24 * 3600)))
+REEL_RESPONSE_STALE_SECONDS = int(os.environ.get("REEL_RESPONSE_STALE_SECONDS", str(30 * 24 * 3600)))
+REEL_RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("REEL_RESPONSE_CACHE_MAX_ENTRIES", "50000"))
+reel_response_cache = PersistentTTLCache(
+    LOOKUP_CACHE_FILE, "reel_responses", REEL_RESPONSE_FRESH_SECONDS + REEL_RESPONSE_STALE_SECONDS,
+    REEL_RESPONSE_CACHE_MAX_ENTRIES
+)
+# Failures are cached briefly (never served stale) so a busy reel doesn't keep hitting Instagram
+NEGATIVE_CACHE_TTL_SECONDS = {
+    "extraction_failed": int(os.environ.get("EXTRACTION_FAILED_CACHE_TTL_SECONDS", "300")),
+    "no_location_found": int(os.environ.get("NO_LOCATION_CACHE_TTL_SECONDS", "3600")),
+    "coordinates_not_found": int(os.environ.get("NO_LOCATION_CACHE_TTL_SECONDS", "3600")),
+}
+reel_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="reel-refresh")
+reel_refreshes = set()
+reel_refreshes_lock = threading.Lock()
+
+# Bulk warming: at most this many place_ids per request, fetched this many at a time
+MAX_WARM_PLACE_IDS = 500
+PLACE_DETAILS_WARM_WORKERS = 4
+
+# Geocoding the cleaned location is hedged against the whole place search after this delay.
+# The two tiers run in their own pool because each tier waits on providers in the shared one.
+GEOCODE_HEDGE_DELAY_SECONDS = float(os.environ.get("GEOCODE_HEDGE_DELAY_SECONDS", "4"))
+lookup_tier_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="lookup-tier")
+
+# Client-side rate limits per worker process (requests per second, burst), sized to each provider's quota
+PROVIDER_RATE_LIMITS = {
+    "google_places": (10, 20),
+    "google_place_details": (10, 20),
+    "serpapi": (1, 5),
+    "opencage": (1, 1),
+    "google_geocoding": (40, 50),
+    "instagram_embed": (2, 5),
+}
+# A provider is skipped for BREAKER_RESET_SECONDS after this many consecutive failures
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.environ.get("BREAKER_RESET_SECONDS", "30"))
+provider_guards = {
+    name: ProviderGuard(name, rate, burst, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+    for name, (rate, burst) in PROVIDER_RATE_LIMITS.items()
+}
+# Google Geocoding reports quota and key problems in a 200 response body
+GOOGLE_GEOCODE_FAILURE_STATUSES = {"OVER_QUERY_LIMIT", "OVER_DAILY_LIMIT", "REQUEST_DENIED", "UNKNOWN_ERROR"}
 
 # Handle SpaCy model for deployment
 try:
@@ -50,35 +152,14 @@ logger = logging.getLogger(__name__)
 
 # --- Database Functions ---
 def save_to_database(reel_data):
-    """Save reel data to the database with proper JSON handling."""
+    """Append reel data to the reel store journal."""
     try:
-        # Create database file if it doesn't exist
-        db_path = Path(DATABASE_FILE)
-        if not db_path.exists():
-            db_path.write_text(json.dumps({"reels": []}))
-        
-        # Read existing data
-        with open(DATABASE_FILE, 'r') as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                data = {"reels": []}
-        
-        # Add timestamp and calculate distance
+        # Add timestamp; distances depend on who is asking, so they are computed at query time
         reel_data["timestamp"] = datetime.now().isoformat()
-        if reel_data["location_data"].get("lat") and reel_data["location_data"].get("lon"):
-            reel_data["location_data"]["distance"] = calculate_distance(
-                YOUR_POSITION["lat"], YOUR_POSITION["lon"],
-                reel_data["location_data"]["lat"], reel_data["location_data"]["lon"]
-            )
+        reel_data["location_data"].pop("distance", None)
 
-        
-        # Add new reel data
-        data["reels"].append(reel_data)
-        
-        # Write back to file with proper formatting
-        with open(DATABASE_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+        reel_store.append(reel_data)
+        reel_index.refresh()
             
         logger.info(f"Saved reel to database: {reel_data['instagram_url']}")
         return True
@@ -86,63 +167,66 @@ def save_to_database(reel_data):
         logger.error(f"Error saving to database: {e}")
         return False
 
-def get_nearby_locations(max_distance_km=50):
-    """Get locations near your position from the database with proper error handling."""
+def get_nearby_locations(max_distance_km=50, lat=None, lon=None, limit=None, cursor=None):
+    """Get saved locations within max_distance_km of an origin (your position by default).
+
+    Returns (locations, next_cursor). With limit only that many of the closest
+    locations are returned, continuing after cursor; next_cursor is None on the
+    last page. Raises InvalidCursor for a malformed cursor.
+    """
+    if lat is None or lon is None:
+        lat, lon = YOUR_POSITION["lat"], YOUR_POSITION["lon"]
     try:
-        # Check if database exists
-        if not Path(DATABASE_FILE).exists():
-            return []
-            
-        # Read data with error handling
-        with open(DATABASE_FILE, 'r') as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                return []
-        
-        # Filter nearby locations and format the response
+        # Only reels in grid cells that overlap the search radius are examined
+        if limit is None:
+            matches, next_cursor = reel_index.within(lat, lon, max_distance_km), None
+        else:
+            matches, next_cursor = reel_index.page(lat, lon, max_distance_km, limit, cursor)
+
         nearby = []
-        for reel in data.get("reels", []):
-            if isinstance(reel, dict) and reel.get("location_data"):
-                loc_data = reel["location_data"]
-                
-                # Calculate distance if not already present
-                if "distance" not in loc_data and loc_data.get("lat") and loc_data.get("lon"):
-                    loc_data["distance"] = calculate_distance(
-                        YOUR_POSITION["lat"], YOUR_POSITION["lon"],
-                        loc_data["lat"], loc_data["lon"]
-                    )
-                
-                if loc_data.get("distance", float('inf')) <= max_distance_km:
-                    nearby.append({
-                        "instagram_url": reel["instagram_url"],
-                        "location_data": loc_data
-                    })
-        
-        # Sort by distance
-        nearby.sort(key=lambda x: x["location_data"].get("distance", float('inf')))
-        return nearby
+        for distance, reel in matches:
+            nearby.append({
+                "instagram_url": reel["instagram_url"],
+                # Copy so the per-origin distance never leaks into the resident index
+                "location_data": dict(reel["location_data"], distance=distance)
+            })
+        
+        # Matches already come back sorted by distance
+        return nearby, next_cursor
+    except InvalidCursor:
+        raise
     except Exception as e:
         logger.error(f"Error getting nearby locations: {e}")
-        return []
-# --- Helper Functions ---
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two coordinates in kilometers using Haversine formula."""
-    R = 6371  # Radius of Earth in km
-    
-    dLat = math.radians(lat2 - lat1)
-    dLon = math.radians(lon2 - lon1)
-    
-    a = (math.sin(dLat / 2) * math.sin(dLat / 2)) + \
-        math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * \
-        (math.sin(dLon / 2) * math.sin(dLon / 2))
-    
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    distance = R * c
-    
-    return distance
+        return [], None
 
 # --- Core Functions (same as before) ---
+def guarded_call(provider, send, is_failure=None):
+    """Send one provider request through its circuit breaker and token bucket.
+
+    Returns the response, or None when the provider is skipped (breaker open or
+    rate limited). Request errors count as failures and are re-raised.
+    """
+    guard = provider_guards[provider]
+    try:
+        guard.before_call()
+    except ProviderUnavailable as e:
+        logger.warning(f"Skipping provider: {e}")
+        return None
+    try:
+        response = send()
+    except Exception:
+        guard.record_failure()
+        raise
+    guard.record_response(response.status_code, response.headers,
+                          failed=bool(is_failure and is_failure(response)))
+    return response
+
+def google_geocode_failed(response):
+    try:
+        return response.json().get("status") in GOOGLE_GEOCODE_FAILURE_STATUSES
+    except ValueError:
+        return True
+
 def convert_serpapi_to_google_maps(url):
     """Convert SerpApi URL to Google Maps URL."""
     try:
@@ -174,48 +258,89 @@ def finalize_maps_url(url):
             return maps_url
     return url
 
-def get_place_details_from_id(place_id, fallback_maps_url):
-    """Fetch place details using Google Maps API."""
-    try:
-        url = f"https://places.googleapis.com/v1/places/{place_id}"
-        headers = {
-            "Content-Type": "application/json",
-            "X-Goog-Api-Key": GOOGLE_MAPS_API_KEY,
-            "X-Goog-FieldMask": "displayName,formattedAddress,location,googleMapsUri"
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        result = response.json()
-        logger.info(f"Google Maps place details for place_id {place_id}: {result}")
-        
-        if 'error' not in result:
-            lat = result.get("location", {}).get("latitude")
-            lon = result.get("location", {}).get("longitude")
-            name = result.get("displayName", {}).get("text", "Unknown Place")
-            address = result.get("formattedAddress", "Unknown Address")
-            maps_url = result.get("googleMapsUri") or fallback_maps_url
-            
-            if lat and lon:
-                maps_url = f"https://www.google.com/maps/search/{quote(name)}/@{lat},{lon},17z"
-            
-            logger.info(f"---------------------\n*** FINAL GOOGLE MAPS LINK ***\n{maps_url}\n---------------------")
-            return {
-                "name": name,
-                "address": address,
-                "lat": lat,
-                "lon": lon,
-                "maps_url": maps_url,
-                "source": "google_maps_api_place_id"
-            }
-        else:
-            logger.error(f"Google Maps API error: {result.get('error', 'No error message')}")
-            
-    except requests.RequestException as e:
-        logger.error(f"Google Maps API request failed for place_id {place_id}: {e}")
-    except Exception as e:
-        logger.error(f"Error fetching place details for place_id {place_id}: {e}")
-    
-    # Fallback response
+def fetch_place_details(place_id):
+    """Return the Places API record for place_id, from the place details cache when possible.
+
+    Raises on request failures; API errors are returned as-is and never cached.
+    """
+    cached = place_details_cache.get(place_id)
+    if cached is not None:
+        logger.info(f"Place details cache hit for place_id {place_id}")
+        return cached
+    return request_place_details(place_id)
+
+def place_details_request(place_id):
+    """Return (url, headers) for a Places API place details call."""
+    url = f"https://places.googleapis.com/v1/places/{place_id}"
+    headers = {
+        "Content-Type": "application/json",
+        "X-Goog-Api-Key": GOOGLE_MAPS_API_KEY,
+        "X-Goog-FieldMask": "displayName,formattedAddress,location,googleMapsUri"
+    }
+    return url, headers
+
+def remember_place_details(place_id, result):
+    """Log a fetched Places record and cache it unless it is an error."""
+    logger.info(f"Google Maps place details for place_id {place_id}: {result}")
+    if 'error' not in result:
+        place_details_cache.set(place_id, result)
+    return result
+
+def request_place_details(place_id):
+    """Fetch the Places API record for place_id and cache it unless it is an error."""
+    url, headers = place_details_request(place_id)
+    response = guarded_call("google_place_details", lambda: http_get(url, headers=headers))
+    if response is None:
+        raise ProviderUnavailable("Places API place details is unavailable")
+    response.raise_for_status()
+    return remember_place_details(place_id, response.json())
+
+def warm_place_details_cache(place_ids):
+    """Fetch uncached place_ids into the place details cache; return counts of what happened."""
+    place_ids = list(dict.fromkeys(pid for pid in place_ids if isinstance(pid, str) and pid.strip()))
+    missing = [pid for pid in place_ids if place_details_cache.get(pid) is None]
+
+    def warm(place_id):
+        try:
+            return 'error' not in request_place_details(place_id)
+        except Exception as e:
+            logger.error(f"Error warming place details for place_id {place_id}: {e}")
+            return False
+
+    with ThreadPoolExecutor(max_workers=PLACE_DETAILS_WARM_WORKERS) as executor:
+        fetched = sum(executor.map(warm, missing))
+    return {
+        "requested": len(place_ids),
+        "already_cached": len(place_ids) - len(missing),
+        "fetched": fetched,
+        "failed": len(missing) - fetched
+    }
+
+def place_details_from_record(result, fallback_maps_url):
+    """Build the place details dict from a Places API record, or the google_maps_api_error fallback."""
+    if 'error' not in result:
+        lat = result.get("location", {}).get("latitude")
+        lon = result.get("location", {}).get("longitude")
+        name = result.get("displayName", {}).get("text", "Unknown Place")
+        address = result.get("formattedAddress", "Unknown Address")
+        maps_url = result.get("googleMapsUri") or fallback_maps_url
+        
+        if lat and lon:
+            maps_url = f"https://www.google.com/maps/search/{quote(name)}/@{lat},{lon},17z"
+        
+        logger.info(f"---------------------\n*** FINAL GOOGLE MAPS LINK ***\n{maps_url}\n---------------------")
+        return {
+            "name": name,
+            "address": address,
+            "lat": lat,
+            "lon": lon,
+            "maps_url": maps_url,
+            "source": "google_maps_api_place_id"
+        }
+    logger.error(f"Google Maps API error: {result.get('error', 'No error message')}")
+    return place_details_fallback(fallback_maps_url)
+
+def place_details_fallback(fallback_maps_url):
     logger.info(f"---------------------\n*** FALLBACK GOOGLE MAPS LINK ***\n{fallback_maps_url}\n---------------------")
     return {
         "name": "Unknown Place",
@@ -226,89 +351,110 @@ def get_place_details_from_id(place_id, fallback_maps_url):
         "source": "google_maps_api_error"
     }
 
-def extract_reel_location_fallback(url):
-    """Alternative Instagram extraction with multiple strategies."""
-    strategies = [
-        # Strategy 1: Basic metadata extraction
-        ['yt-dlp', '--dump-json', '--no-download', '--ignore-errors'],
-        # Strategy 2: With user agent
-        ['yt-dlp', '--dump-json', '--no-download', '--ignore-errors',
-         '--user-agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'],
-        # Strategy 3: With cookies (if available)
-        ['yt-dlp', '--dump-json', '--no-download', '--ignore-errors',
-         '--cookies-from-browser', 'chrome']
-    ]
-    
-    for i, strategy in enumerate(strategies):
-        try:
-            result = subprocess.run(
-                strategy + [url],
-                capture_output=True, text=True, timeout=30
-            )
-            
-            if result.returncode == 0 and result.stdout:
-                info = json.loads(result.stdout)
-                description = info.get("description", "")
-                if description:
-                    logger.info(f"Strategy {i+1} succeeded: extracted description")
-                    return description
-                    
-        except Exception as e:
-            logger.error(f"Strategy {i+1} failed: {e}")
-            continue
+def get_place_details_from_id(place_id, fallback_maps_url):
+    """Fetch place details using Google Maps API."""
+    try:
+        return place_details_from_record(fetch_place_details(place_id), fallback_maps_url)
+    except requests.RequestException as e:
+        logger.error(f"Google Maps API request failed for place_id {place_id}: {e}")
+    except Exception as e:
+        logger.error(f"Error fetching place details for place_id {place_id}: {e}")
     
+    # Fallback response
+    return place_details_fallback(fallback_maps_url)
+
+# Embed pages are read and scanned in chunks of this size, so a fetch stops soon after the caption
+EMBED_CHUNK_BYTES = 16 * 1024
+
+EMBED_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+}
+
+def embed_url_for(url):
+    """Instagram embed page for a reel URL, which is less restricted than the reel page."""
+    return url.replace('/reel/', '/p/').replace('?', '/embed/?')
+
+def extract_reel_location_fallback(url):
+    """Alternative Instagram extraction: strategies raced in the order that has recently worked best."""
+    race = StrategyRace()
+    strategies = {
+        name: lambda name=name: extract_strategy_description(name, url, race.cancel)
+        for name, _ in DESCRIPTION_STRATEGIES
+    }
     # Web scraping fallback
+    strategies[EMBED_STRATEGY] = lambda: fetch_embed_caption(url, race.cancel)
+    name = None
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive',
-        }
-        
-        # Try embed URL which is less restricted
-        embed_url = url.replace('/reel/', '/p/').replace('?', '/embed/?')
-        response = requests.get(embed_url, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            content = response.text
-            # Look for JSON-LD data
-            json_ld_match = re.search(r'<script type="application/ld\+json">([^<]+)</script>', content)
-            if json_ld_match:
-                try:
-                    data = json.loads(json_ld_match.group(1))
-                    if 'caption' in data:
-                        return data['caption']
-                except:
-                    pass
-            
-            # Look for description in meta tags
-            desc_match = re.search(r'<meta name="description" content="([^"]*)"', content)
-            if desc_match:
-                return desc_match.group(1)
-                
+        name, description = hedged_call(
+            [(name, race.track(name, strategies[name])) for name in strategy_stats.plan()],
+            validate=bool,
+            hedge_delay=DESCRIPTION_HEDGE_DELAY_SECONDS,
+            preference_window=0,
+            timeout=DESCRIPTION_TIMEOUT_SECONDS,
+            executor=extraction_executor,
+        )
+    finally:
+        # Strategies still running stop at their next request, the embed fetch at its next chunk
+        race.finish(won=name is not None)
+    if name:
+        logger.info(f"Strategy '{name}' succeeded: extracted description")
+    return description or ""
+
+def fetch_embed_caption(url, cancel=None):
+    """Return the caption from the reel's embed page, or ''.
+
+    The page is streamed and parsed as it arrives; reading stops as soon as
+    the caption is found, or once cancel is set.
+    """
+    try:
+        response = guarded_call(
+            "instagram_embed", lambda: http_get(embed_url_for(url), headers=EMBED_HEADERS, stream=True)
+        )
+        if response is None:
+            return ""
+        # Closing a response that wasn't read to the end drops the connection instead of downloading the rest
+        with response:
+            if response.status_code != 200:
+                return ""
+            scanner = EmbedCaptionScanner()
+            decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+            received = 0
+            for chunk in response.iter_content(EMBED_CHUNK_BYTES):
+                if cancel is not None and cancel.is_set():
+                    logger.info(f"Embed page fetch cancelled for {url}")
+                    return ""
+                received += len(chunk)
+                if scanner.feed(decoder.decode(chunk)):
+                    break
+            else:
+                scanner.feed(decoder.decode(b"", final=True))
+        caption = scanner.result()
+        if caption:
+            logger.info(f"Embed page caption found after {received} bytes")
+        return caption or ""
     except Exception as e:
         logger.error(f"Web scraping fallback failed: {e}")
-    
-    return ""
+        return ""
 
 def download_reel(url, output_path):
     """Download Instagram reel using yt-dlp with improved error handling."""
     strategies = [
         # Strategy 1: Basic download
-        ["yt-dlp", "-f", "best[ext=mp4]", "-o", output_path],
+        {"format": "best[ext=mp4]"},
         # Strategy 2: With user agent and headers
-        ["yt-dlp", "-f", "best[ext=mp4]", "-o", output_path,
-         "--user-agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-         "--add-header", "Accept:text/html,application/xhtml+xml"]
+        {"format": "best[ext=mp4]",
+         "http_headers": {"User-Agent": BROWSER_USER_AGENT, "Accept": "text/html,application/xhtml+xml"}}
     ]
     
     for i, strategy in enumerate(strategies):
         try:
-            subprocess.run(strategy + [url], check=True, timeout=120)
+            download_video(url, output_path, strategy)
             logger.info(f"Downloaded reel to {output_path} using strategy {i+1}")
             return output_path
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        except Exception as e:
             logger.error(f"Download strategy {i+1} failed: {e}")
             if i == len(strategies) - 1:  # Last strategy
                 raise
@@ -317,10 +463,19 @@ def download_reel(url, output_path):
     return output_path
 
 def extract_description(url):
-    """Extract reel description using multiple fallback methods."""
+    """Extract reel description using multiple fallback methods, cached by reel shortcode."""
+    shortcode = canonical_reel_key(url)
+    if shortcode:
+        cached = caption_cache.get(shortcode)
+        if cached is not None:
+            logger.info(f"Caption cache hit for {shortcode}")
+            return cached
+
     description = extract_reel_location_fallback(url)
     if description:
         logger.info(f"Extracted description: {description[:150]}...")
+        if shortcode:
+            caption_cache.set(shortcode, description)
         return description
     else:
         logger.warning("Could not extract description from Instagram reel")
@@ -373,123 +528,182 @@ def clean_location_block(location_block):
     cleaned = re.sub(r'@\w+\.\w+', '', location_block).strip()
     cleaned = re.sub(r'@\w+', '', cleaned).strip()
     cleaned = re.sub(r'371302', '682025', cleaned).strip()  # Fix common postal code error
-    cleaned = re.sub(r'\s*,\s*', ', ', cleaned).strip(', ')
-    
-    # Add location context for better results (customize based on your region)
-    if "Kochi" not in cleaned and "Kerala" not in cleaned:
-        cleaned += ", Kochi, Kerala, 682025"
-    elif "Kochi" in cleaned and "Kerala" not in cleaned:
-        cleaned += ", Kerala, 682025"
-    elif "Kerala" in cleaned and "682025" not in cleaned:
-        cleaned += ", 682025"
-    
-    # Remove extra spaces and fix formatting
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+
+    # Same canonical form (and Kochi default) as every other lookup path, so caches line up
+    cleaned = canonical_address(cleaned)
     
     logger.info(f"Cleaned location block: '{cleaned}'")
     return cleaned
 
 def google_maps_search(query, business_name=None):
-    """Search for location using Google Maps Places API with SerpAPI fallback."""
-    search_query = f"{business_name}, {query}" if business_name else query
+    """Search for location using Google Maps Places API with SerpAPI fallback, cached by normalized query."""
+    search_query = build_search_query(query, business_name)
+    cache_key = search_cache_key(query, business_name)
+    cached = search_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Maps search cache hit for: '{search_query}'")
+        return dict(cached)
+
+    result = search_places_uncached(query, search_query)
+    # Only answers with coordinates are worth keeping; a miss may succeed next time
+    if has_coordinates(result):
+        search_cache.set(cache_key, result)
+    return result
+
+def build_search_query(query, business_name=None):
+    return f"{business_name}, {query}" if business_name else query
+
+def search_cache_key(query, business_name=None):
+    """Cache key for a place search: the normalized business name plus the canonical address."""
+    return normalize_search_query(build_search_query(address_key(query), business_name))
+
+def has_coordinates(result):
+    """True for a search result dict that carries both lat and lon."""
+    return bool(result) and result.get("lat") is not None and result.get("lon") is not None
+
+def search_places_uncached(query, search_query):
+    """Race Google Maps Places API against SerpAPI (hedged, Places preferred) for search_query."""
     logger.info(f"Searching Google Maps for: '{search_query}'")
-    
-    # Primary: Google Maps Places API
+    _, result = hedged_call(
+        [
+            ("google_maps_api", lambda: search_google_places(query, search_query)),
+            ("serpapi", lambda: search_serpapi_maps(query, search_query)),
+        ],
+        validate=has_coordinates,
+    )
+    return result
+
+PLACES_SEARCH_URL = "https://places.googleapis.com/v1/places:searchText"
+SERPAPI_SEARCH_URL = "https://serpapi.com/search.json"
+
+def places_search_request(search_query):
+    """Return (headers, payload) for a Places API searchText call."""
+    headers = {
+        "Content-Type": "application/json",
+        "X-Goog-Api-Key": GOOGLE_MAPS_API_KEY,
+        "X-Goog-FieldMask": "places.displayName,places.formattedAddress,places.location,places.googleMapsUri,places.id"
+    }
+    payload = {
+        "textQuery": search_query,
+        "languageCode": "en",
+        "regionCode": "IN"
+    }
+    return headers, payload
+
+def parse_places_search(results, query, search_query):
+    """Turn a Places API searchText response into a search result dict, or None."""
+    logger.info(f"Google Maps API results: {results}")
+    if results.get("places"):
+        place = results["places"][0]
+        lat = place["location"]["latitude"]
+        lon = place["location"]["longitude"]
+        name = place.get("displayName", {}).get("text", search_query)
+        maps_url = place.get("googleMapsUri") or f"https://www.google.com/maps/search/{quote(name)}/@{lat},{lon},17z"
+        
+        return {
+            "name": name,
+            "address": place.get("formattedAddress", query),
+            "lat": lat,
+            "lon": lon,
+            "maps_url": maps_url,
+            "source": "google_maps_api"
+        }
+    logger.warning(f"Google Maps API returned no places: {results.get('status', 'No status')}")
+    return None
+
+def search_google_places(query, search_query):
+    """Search Google Maps Places API (searchText) for search_query."""
     try:
-        url = "https://places.googleapis.com/v1/places:searchText"
-        headers = {
-            "Content-Type": "application/json",
-            "X-Goog-Api-Key": GOOGLE_MAPS_API_KEY,
-            "X-Goog-FieldMask": "places.displayName,places.formattedAddress,places.location,places.googleMapsUri,places.id"
-        }
-        payload = {
-            "textQuery": search_query,
-            "languageCode": "en",
-            "regionCode": "IN"
-        }
-        
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
-        results = response.json()
-        logger.info(f"Google Maps API results: {results}")
-
-        if results.get("places"):
-            place = results["places"][0]
-            lat = place["location"]["latitude"]
-            lon = place["location"]["longitude"]
-            name = place.get("displayName", {}).get("text", search_query)
-            maps_url = place.get("googleMapsUri") or f"https://www.google.com/maps/search/{quote(name)}/@{lat},{lon},17z"
-            
-            return {
-                "name": name,
-                "address": place.get("formattedAddress", query),
-                "lat": lat,
-                "lon": lon,
-                "maps_url": maps_url,
-                "source": "google_maps_api"
-            }
-        else:
-            logger.warning(f"Google Maps API returned no places: {results.get('status', 'No status')}")
-            
+        headers, payload = places_search_request(search_query)
+        response = guarded_call("google_places", lambda: http_post(PLACES_SEARCH_URL, json=payload, headers=headers))
+        if response is not None:
+            return parse_places_search(response.json(), query, search_query)
     except Exception as e:
         logger.error(f"Google Maps API search failed: {e}")
+    return None
+
+def serpapi_maps_params(search_query):
+    return {
+        "engine": "google_maps",
+        "q": search_query,
+        "ll": "@9.931233,76.267304,15z",  # Kochi, Kerala coordinates
+        "type": "search",
+        "api_key": SERPAPI_KEY
+    }
+
+def parse_serpapi_maps(results, query, search_query):
+    """Turn a SerpAPI Google Maps response into a search result dict, or None."""
+    logger.info(f"SerpAPI results: {results}")
+
+    # Check for place results first
+    if "place_results" in results:
+        place = results["place_results"]
+        coords = place.get("gps_coordinates", {})
+        lat = coords.get("latitude")
+        lon = coords.get("longitude")
+        name = place.get("title", search_query)
+        maps_url = place.get("place_id_search") or f"https://www.google.com/maps/search/{quote(name)}/@{lat},{lon},17z"
+        
+        return {
+            "name": name,
+            "address": place.get("address", query),
+            "lat": lat,
+            "lon": lon,
+            "maps_url": maps_url,
+            "source": "serpapi_places"
+        }
+    
+    # Check local results
+    elif "local_results" in results and results["local_results"]:
+        place = results["local_results"][0]
+        coords = place.get("gps_coordinates", {})
+        lat = coords.get("latitude")
+        lon = coords.get("longitude")
+        name = place.get("title", search_query)
+        place_results_link = place.get("links", {}).get("place_results")
+        maps_url = place_results_link or f"https://www.google.com/maps/search/{quote(name)}/@{lat},{lon},17z"
+        
+        return {
+            "name": name,
+            "address": place.get("address", query),
+            "lat": lat,
+            "lon": lon,
+            "maps_url": maps_url,
+            "source": "serpapi_local"
+        }
+    
+    logger.warning("SerpAPI returned no useful results")
+    return None
 
-    # Fallback: SerpAPI Google Maps
+def search_serpapi_maps(query, search_query):
+    """Search SerpAPI's Google Maps engine for search_query."""
     try:
-        params = {
-            "engine": "google_maps",
-            "q": search_query,
-            "ll": "@9.931233,76.267304,15z",  # Kochi, Kerala coordinates
-            "type": "search",
-            "api_key": SERPAPI_KEY
-        }
-        
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        logger.info(f"SerpAPI results: {results}")
-
-        # Check for place results first
-        if "place_results" in results:
-            place = results["place_results"]
-            coords = place.get("gps_coordinates", {})
-            lat = coords.get("latitude")
-            lon = coords.get("longitude")
-            name = place.get("title", search_query)
-            maps_url = place.get("place_id_search") or f"https://www.google.com/maps/search/{quote(name)}/@{lat},{lon},17z"
-            
-            return {
-                "name": name,
-                "address": place.get("address", query),
-                "lat": lat,
-                "lon": lon,
-                "maps_url": maps_url,
-                "source": "serpapi_places"
-            }
-        
-        # Check local results
-        elif "local_results" in results and results["local_results"]:
-            place = results["local_results"][0]
-            coords = place.get("gps_coordinates", {})
-            lat = coords.get("latitude")
-            lon = coords.get("longitude")
-            name = place.get("title", search_query)
-            place_results_link = place.get("links", {}).get("place_results")
-            maps_url = place_results_link or f"https://www.google.com/maps/search/{quote(name)}/@{lat},{lon},17z"
-            
-            return {
-                "name": name,
-                "address": place.get("address", query),
-                "lat": lat,
-                "lon": lon,
-                "maps_url": maps_url,
-                "source": "serpapi_local"
-            }
-        
-        logger.warning("SerpAPI returned no useful results")
-        return None
-        
+        # Plain HTTP instead of the serpapi client so the call shares the pooled session
+        response = guarded_call("serpapi", lambda: http_get(SERPAPI_SEARCH_URL, params=serpapi_maps_params(search_query)))
+        if response is not None:
+            return parse_serpapi_maps(response.json(), query, search_query)
     except Exception as e:
         logger.error(f"SerpAPI Google Maps search failed: {e}")
-        return None
+    return None
+
+def resolve_coordinates(cleaned_location, business_name=None):
+    """Race place search against geocoding (search preferred).
+
+    Returns ("search", search_result), ("geocode", (lat, lon)) or (None, None).
+    """
+    def search():
+        result = google_maps_search(cleaned_location, business_name)
+        return result if result and result.get("lat") and result.get("lon") else None
+
+    def geocode():
+        lat, lon = get_coordinates_from_address(cleaned_location)
+        return (lat, lon) if lat and lon else None
+
+    return hedged_call(
+        [("search", search), ("geocode", geocode)],
+        hedge_delay=GEOCODE_HEDGE_DELAY_SECONDS,
+        executor=lookup_tier_executor,
+    )
 
 def get_coordinates_from_maps(url):
     """Extract coordinates from Google Maps URL."""
@@ -504,65 +718,385 @@ def get_coordinates_from_maps(url):
         logger.error(f"Error extracting coordinates from maps URL: {e}")
         return None, None
 
+OPENCAGE_GEOCODE_URL = "https://api.opencagedata.com/geocode/v1/json"
+
 def get_coordinates_from_address(address):
-    """Geocode address using OpenCage with Google Maps fallback."""
+    """Geocode address with OpenCage and Google Maps Geocoding raced as hedged providers (OpenCage preferred)."""
     if not address:
         return None, None
-        
-    try:
-        # Clean and refine the address
-        address_parts = address.split(", ")
-        refined_address = ", ".join(part for part in address_parts if part not in ["India", "Ernakulam"])
-        
-        if "Kochi" not in refined_address and "Kerala" not in refined_address:
-            refined_address += ", Kochi, Kerala, 682025"
-        
-        logger.info(f"Geocoding refined address: '{refined_address}'")
-        
-        # Primary: OpenCage Geocoding API
-        response = requests.get("https://api.opencagedata.com/geocode/v1/json", 
-                              params={
-                                  "q": refined_address,
-                                  "key": OPENCAGE_API_KEY,
-                                  "limit": 1,
-                                  "countrycode": "in"
-                              }, timeout=10)
-        
-        data = response.json()
-        logger.info(f"OpenCage result: {data}")
-        
-        if data.get("results"):
-            geometry = data["results"][0]["geometry"]
-            lat = geometry["lat"]
-            lon = geometry["lng"]
-            logger.info(f"OpenCage geocoding successful: {lat}, {lon}")
-            return lat, lon
+
+    key = address_key(address)
+    cached = geocode_cache.get(key)
+    if cached is not None:
+        logger.info(f"Geocode cache hit for: '{address}'")
+        return tuple(cached)
+    return geocode_and_cache(address, key)
+
+def geocode_and_cache(address, key):
+    """Geocode address without consulting the cache; successful results are stored under key."""
+    refined_address = canonical_address(address)
+    logger.info(f"Geocoding refined address: '{refined_address}'")
+    _, coordinates = hedged_call(
+        [
+            ("opencage", lambda: geocode_opencage(refined_address)),
+            ("google_geocoding", lambda: geocode_google(refined_address)),
+        ],
+        validate=bool,
+    )
+    if coordinates:
+        geocode_cache.set(key, list(coordinates))
+    return coordinates or (None, None)
+
+def batch_geocode(addresses):
+    """Geocode many addresses, yielding one result dict per distinct address as soon as it is known.
+
+    Inputs are deduplicated by canonical address; cached ones are yielded first,
+    the rest are geocoded BATCH_GEOCODE_WORKERS at a time in completion order.
+    """
+    inputs = {}
+    for address in addresses:
+        if isinstance(address, str) and address.strip():
+            inputs.setdefault(address_key(address), []).append(address)
+
+    misses = []
+    for key, originals in inputs.items():
+        cached = geocode_cache.get(key)
+        if cached is None:
+            misses.append(key)
         else:
-            logger.warning("OpenCage found no results, trying Google Maps geocoding")
-            
+            yield batch_geocode_result(originals, cached, cached=True)
+
+    executor = ThreadPoolExecutor(max_workers=BATCH_GEOCODE_WORKERS, thread_name_prefix="batch-geocode")
+    try:
+        futures = {executor.submit(geocode_and_cache, inputs[key][0].strip(), key): key for key in misses}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                coordinates = future.result()
+            except Exception as e:
+                logger.error(f"Error geocoding '{inputs[key][0]}': {e}")
+                coordinates = (None, None)
+            yield batch_geocode_result(inputs[key], coordinates, cached=False)
+    finally:
+        # A closed stream (client went away) drops whatever hasn't started yet
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def batch_geocode_result(originals, coordinates, cached):
+    lat, lon = coordinates
+    return {
+        "address": originals[0],
+        "inputs": len(originals),
+        "lat": lat,
+        "lon": lon,
+        "found": lat is not None and lon is not None,
+        "cached": cached
+    }
+
+def opencage_params(refined_address):
+    return {
+        "q": refined_address,
+        "key": OPENCAGE_API_KEY,
+        "limit": 1,
+        "countrycode": "in"
+    }
+
+def parse_opencage(data):
+    """Return (lat, lon) from an OpenCage response, or None."""
+    logger.info(f"OpenCage result: {data}")
+    if data.get("results"):
+        geometry = data["results"][0]["geometry"]
+        lat = geometry["lat"]
+        lon = geometry["lng"]
+        logger.info(f"OpenCage geocoding successful: {lat}, {lon}")
+        return lat, lon
+    logger.warning("OpenCage found no results")
+    return None
+
+def geocode_opencage(refined_address):
+    """Geocode with the OpenCage API; return (lat, lon) or None."""
+    try:
+        response = guarded_call("opencage", lambda: http_get(OPENCAGE_GEOCODE_URL, params=opencage_params(refined_address)))
+        if response is not None:
+            return parse_opencage(response.json())
     except Exception as e:
         logger.error(f"OpenCage geocoding error: {e}")
+    return None
+
+def google_geocode_url(refined_address):
+    return f"https://maps.googleapis.com/maps/api/geocode/json?address={quote(refined_address)}&key={GOOGLE_MAPS_API_KEY}"
 
-    # Fallback: Google Maps Geocoding API
+def parse_google_geocode(data):
+    """Return (lat, lon) from a Google Maps Geocoding response, or None."""
+    logger.info(f"Google Maps Geocoding result: {data}")
+    if data["status"] == "OK" and data["results"]:
+        location = data["results"][0]["geometry"]["location"]
+        lat = location["lat"]
+        lon = location["lng"]
+        logger.info(f"Google Maps geocoding successful: {lat}, {lon}")
+        return lat, lon
+    logger.warning(f"Google Maps Geocoding failed with status: {data.get('status')}")
+    return None
+
+def geocode_google(refined_address):
+    """Geocode with the Google Maps Geocoding API; return (lat, lon) or None."""
     try:
-        geocode_url = f"https://maps.googleapis.com/maps/api/geocode/json?address={quote(refined_address)}&key={GOOGLE_MAPS_API_KEY}"
-        response = requests.get(geocode_url, timeout=10)
-        data = response.json()
-        logger.info(f"Google Maps Geocoding result: {data}")
-        
-        if data["status"] == "OK" and data["results"]:
-            location = data["results"][0]["geometry"]["location"]
-            lat = location["lat"]
-            lon = location["lng"]
-            logger.info(f"Google Maps geocoding successful: {lat}, {lon}")
-            return lat, lon
-        else:
-            logger.warning(f"Google Maps Geocoding failed with status: {data.get('status')}")
-            
+        response = guarded_call("google_geocoding", lambda: http_get(google_geocode_url(refined_address)),
+                                is_failure=google_geocode_failed)
+        if response is not None:
+            return parse_google_geocode(response.json())
     except Exception as e:
         logger.error(f"Google Maps Geocoding error: {e}")
-    
-    return None, None
+    return None
+
+# --- Reel Resolution ---
+# Shared by the sync Flask route (resolve_reel) and the async pipeline in asgi.py
+LOCATION_KEYWORDS = ["location", "address", "place", "shop location", "📍", "🏠", "🏢", "🏪"]
+
+def location_error(location_text, error, source, address=None, maps_url=None):
+    """Response payload for a reel that couldn't be resolved to coordinates."""
+    return {
+        "location_text": location_text,
+        "error": error,
+        "lat": None, "lon": None, "maps_url": maps_url,
+        "source": source, "address": address
+    }
+
+def validate_reel_url(reel_url):
+    """Return (payload, status) describing what is wrong with reel_url, or None if it can be resolved."""
+    if not reel_url:
+        logger.error("No URL provided in request")
+        return location_error("No URL provided", "Instagram reel URL is required", "validation_error"), 400
+
+    # Validate URL format
+    if not any(domain in reel_url for domain in ['instagram.com', 'serpapi.com']):
+        return location_error(
+            "Invalid URL format", "Please provide a valid Instagram reel URL or SerpAPI URL", "validation_error"
+        ), 400
+    return None
+
+def place_details_payload(result):
+    response = {
+        "location_text": f"Found: {result['name']}",
+        "lat": result["lat"],
+        "lon": result["lon"], 
+        "maps_url": finalize_maps_url(result["maps_url"]),
+        "source": result["source"],
+        "address": result["address"]
+    }
+    logger.info(f"SerpAPI processing complete - map link: {response['maps_url']}")
+    return response
+
+def serpapi_error_payload(maps_url, error):
+    logger.error(f"Error processing SerpApi URL: {str(error)}")
+    return location_error(
+        "Could not process SerpAPI URL", f"SerpAPI processing failed: {str(error)}", "serpapi_error",
+        maps_url=finalize_maps_url(maps_url)
+    )
+
+def find_location_block(description):
+    """Return the text following a location keyword line (plus its continuation lines), or None."""
+    lines = description.splitlines()
+    for i, line in enumerate(lines):
+        line_lower = line.strip().lower()
+        if any(keyword in line_lower for keyword in LOCATION_KEYWORDS):
+            if ":" in line:
+                location_block = line.split(":", 1)[1].strip()
+            else:
+                location_block = line.strip()
+            
+            # Collect continuation lines
+            collected_lines = []
+            for j in range(i + 1, len(lines)):
+                next_line = lines[j].strip()
+                if not next_line or next_line.startswith("#") or next_line.startswith("@"):
+                    break
+                collected_lines.append(next_line)
+            
+            if collected_lines:
+                location_block += " " + " ".join(collected_lines)
+            return location_block
+    return None
+
+def coordinates_payload(tier, resolved, cleaned_location):
+    """Return (payload, status) for the outcome of resolve_coordinates."""
+    if tier == "search":
+        search_result = resolved
+        final_maps_url = finalize_maps_url(search_result["maps_url"])
+        response = {
+            "location_text": f"Found: {search_result['name']}",
+            "lat": search_result["lat"],
+            "lon": search_result["lon"],
+            "maps_url": final_maps_url,
+            "source": search_result["source"],
+            "address": search_result.get("address", cleaned_location)
+        }
+        logger.info(f"Location search successful - map link: {final_maps_url}")
+        return response, 200
+
+    # Fallback to geocoding if direct search fails
+    if tier == "geocode":
+        logger.info("Direct search failed, using geocoding fallback")
+        lat, lon = resolved
+        fallback_maps_url = f"https://www.google.com/maps/search/?q={lat},{lon}&z=17"
+        response = {
+            "location_text": f"Found via geocoding: {cleaned_location}",
+            "lat": lat,
+            "lon": lon,
+            "maps_url": fallback_maps_url,
+            "source": "geocoding_fallback",
+            "address": cleaned_location
+        }
+        logger.info(f"Geocoding fallback successful - map link: {fallback_maps_url}")
+        return response, 200
+
+    # No coordinates found anywhere
+    return location_error(
+        f"Location identified but coordinates not found: {cleaned_location}",
+        "Could not determine precise coordinates for this location",
+        "coordinates_not_found",
+        address=cleaned_location
+    ), 422
+
+EXTRACTION_FAILED = (
+    "Could not extract description from Instagram reel",
+    "Instagram may be restricting access or the reel has no description. Try a different reel.",
+    "extraction_failed"
+)
+NO_LOCATION_FOUND = (
+    "No location information found in reel description",
+    "The reel description doesn't contain recognizable location information",
+    "no_location_found"
+)
+
+def processing_error_payload(error):
+    logger.error(f"Error processing Instagram reel: {str(error)}")
+    return location_error("Error processing Instagram reel", f"Processing failed: {str(error)}", "processing_error")
+
+def server_error_payload(error):
+    logger.error(f"Unexpected error in get_location: {str(error)}")
+    return location_error("Internal server error", "An unexpected error occurred. Please try again.", "server_error")
+
+def resolve_reel(reel_url):
+    """Resolve an Instagram reel (or SerpApi place) URL to a location; return (payload, HTTP status)."""
+    try:
+        invalid = validate_reel_url(reel_url)
+        if invalid:
+            return invalid
+
+        # Check if the URL is a SerpApi URL
+        maps_url, place_id = convert_serpapi_to_google_maps(reel_url)
+        if maps_url is not None and place_id is not None:
+            try:
+                return place_details_payload(get_place_details_from_id(place_id, maps_url)), 200
+            except Exception as e:
+                return serpapi_error_payload(maps_url, e), 422
+
+        # Process Instagram reel
+        try:
+            # Extract description without downloading video to avoid Instagram restrictions
+            description = extract_description(reel_url)
+            if not description:
+                return location_error(*EXTRACTION_FAILED), 422
+            logger.info(f"Successfully extracted description: {description[:200]}...")
+            
+            # Parse description for location information
+            business_name = extract_business_name(description)
+            location_block = find_location_block(description)
+
+            # If no explicit location block found, use NLP extraction
+            if not location_block:
+                logger.info("No location block found, using NLP extraction")
+                location_names = extract_location_name(description)
+                if not location_names:
+                    return location_error(*NO_LOCATION_FOUND), 422
+                location_block = " ".join(location_names)
+                logger.info(f"Using NLP extracted locations: {location_block}")
+
+            # Clean and standardize the location block
+            cleaned_location = clean_location_block(location_block)
+            
+            # Search for the location using various APIs, with geocoding hedged in as a fallback
+            tier, resolved = resolve_coordinates(cleaned_location, business_name)
+            return coordinates_payload(tier, resolved, cleaned_location)
+
+        except Exception as processing_error:
+            return processing_error_payload(processing_error), 500
+
+    except Exception as e:
+        return server_error_payload(e), 500
+
+def reel_flight_key(reel_url):
+    """Single-flight key for a reel URL (its shortcode), or None if it isn't an Instagram reel."""
+    shortcode = canonical_reel_key(reel_url)
+    return f"reel:{shortcode}" if shortcode else None
+
+def resolve_reel_once(reel_url):
+    """resolve_reel answered from the response cache, or shared with identical requests already in flight."""
+    key = reel_flight_key(reel_url)
+    if key is None:
+        return resolve_reel(reel_url)
+    cached = cached_reel_response(reel_url, key)
+    if cached is not None:
+        return cached
+    return reel_flights.do(key, lambda: remember_reel_response(key, *resolve_reel(reel_url)))
+
+def reel_response_ttl(payload, status):
+    """Return (fresh_seconds, stale_seconds) to cache a response for, or None if it must not be cached."""
+    if status == 200:
+        return REEL_RESPONSE_FRESH_SECONDS, REEL_RESPONSE_STALE_SECONDS
+    negative_ttl = NEGATIVE_CACHE_TTL_SECONDS.get(payload.get("source"))
+    if status == 422 and negative_ttl:
+        return negative_ttl, 0
+    return None
+
+def remember_reel_response(key, payload, status):
+    ttl = reel_response_ttl(payload, status)
+    if ttl is not None:
+        fresh_seconds, stale_seconds = ttl
+        entry = {"payload": payload, "status": status, "fresh_until": time.time() + fresh_seconds}
+        reel_response_cache.set(key, entry, ttl_seconds=fresh_seconds + stale_seconds)
+    return payload, status
+
+def cached_reel_response(reel_url, key):
+    """Return the cached (payload, status) for a reel, refreshing it in the background once stale."""
+    entry = reel_response_cache.get(key)
+    if entry is None:
+        return None
+    if entry["fresh_until"] <= time.time():
+        # The memory front keeps this worker's copy; another worker may already have refreshed the shared row
+        entry = reel_response_cache.reload(key)
+        if entry is None:
+            return None
+    if entry["fresh_until"] <= time.time():
+        logger.info(f"Serving stale response for {key}, refreshing")
+        with reel_refreshes_lock:
+            refreshing = key in reel_refreshes
+            reel_refreshes.add(key)
+        if not refreshing:
+            reel_refresh_executor.submit(refresh_reel_response, reel_url, key, entry)
+    return entry["payload"], entry["status"]
+
+def refresh_reel_response(reel_url, key, stale_entry):
+    """Re-resolve a stale reel; a failed refresh keeps serving the old answer and retries later."""
+    try:
+        current = reel_response_cache.reload(key)
+        if current is not None and current["fresh_until"] > time.time():
+            # Refreshed by another worker while this one was queued
+            return
+        payload, status = reel_flights.do(key, lambda: resolve_reel(reel_url))
+        if status == 200 or stale_entry["status"] != 200:
+            remember_reel_response(key, payload, status)
+        else:
+            # Don't replace a good answer with a transient failure; back off before the next attempt
+            logger.warning(f"Refresh of {key} failed ({payload.get('source')}), keeping cached response")
+            retry_in = NEGATIVE_CACHE_TTL_SECONDS.get(payload.get("source"), REEL_RESPONSE_FRESH_SECONDS)
+            entry = dict(stale_entry, fresh_until=time.time() + retry_in)
+            reel_response_cache.set(key, entry, ttl_seconds=retry_in + REEL_RESPONSE_STALE_SECONDS)
+    except Exception as e:
+        logger.error(f"Error refreshing {key}: {e}")
+    finally:
+        with reel_refreshes_lock:
+            reel_refreshes.discard(key)
 
 # --- Flask Routes ---
 
@@ -1161,7 +1695,7 @@ def index():
         <div class="container">
           <div class="section-title">
             <h2>Places Near Me</h2>
-            <p>Discover locations near TinkerSpace that others have found</p>
+            <p>Discover locations near you that others have found</p>
           </div>
           
           <div class="action-buttons" style="justify-content: center; margin-bottom: 20px;">
@@ -1173,6 +1707,12 @@ def index():
           <div class="nearby-locations" id="nearby-locations">
             <!-- Nearby locations will be loaded here -->
           </div>
+          
+          <div class="action-buttons" style="justify-content: center; margin-top: 20px;">
+            <button class="btn" onclick="loadNearbyLocations(true)" id="nearby-more-btn" style="display: none;">
+              <i class="fas fa-chevron-down"></i> Load More
+            </button>
+          </div>
         </div>
       </section>
       
@@ -1452,45 +1992,90 @@ def index():
           }
         }
         
-        // Load nearby locations
-        // Load nearby locations
-        // Load nearby locations
-        async function loadNearbyLocations() {
+        // Resolve the browser's position, or null if unavailable/denied
+        function getUserPosition() {
+            return new Promise(resolve => {
+                if (!navigator.geolocation) {
+                    resolve(null);
+                    return;
+                }
+                navigator.geolocation.getCurrentPosition(
+                    pos => resolve({ lat: pos.coords.latitude, lon: pos.coords.longitude }),
+                    () => resolve(null),
+                    { timeout: 5000, maximumAge: 300000 }
+                );
+            });
+        }
+        
+        // Nearby results are fetched one page at a time, closest first
+        const NEARBY_PAGE_SIZE = 12;
+        let nearbyParams = null;
+        let nearbyCursor = null;
+        
+        function renderNearbyCard(location) {
+            const locData = location.location_data || {};
+            const name = locData.location_text 
+                ? locData.location_text.replace('Found: ', '').replace('Found via geocoding: ', '')
+                : 'Unknown Location';
+            const address = locData.address || 'Address not available';
+            const mapsUrl = locData.maps_url || '#';
+            const instaUrl = location.instagram_url || '#';
+            const distance = locData.distance != null ? locData.distance.toFixed(1) : null;
+            
+            return `
+            <div class="nearby-card">
+                <h4>${name}</h4>
+                <p>${address}</p>
+                ${mapsUrl !== '#' ? `<p><a href="${mapsUrl}" target="_blank">View on Maps</a></p>` : ''}
+                ${instaUrl !== '#' ? `<p><a href="${instaUrl}" target="_blank">View Instagram Reel</a></p>` : ''}
+                ${distance ? `<span class="nearby-distance">${distance} km away</span>` : ''}
+            </div>
+            `;
+        }
+        
+        // Load nearby locations (loadMore fetches the next page of the current search)
+        async function loadNearbyLocations(loadMore = false) {
             const nearbyBtn = document.getElementById('nearby-btn');
+            const moreBtn = document.getElementById('nearby-more-btn');
             const nearbyContainer = document.getElementById('nearby-locations');
+            const activeBtn = loadMore ? moreBtn : nearbyBtn;
+            const activeBtnHtml = activeBtn.innerHTML;
             
             try {
-                nearbyBtn.disabled = true;
-                nearbyBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Loading...';
+                activeBtn.disabled = true;
+                activeBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Loading...';
+                
+                if (!loadMore) {
+                    // Search around the user if the browser shares a position, else around TinkerSpace
+                    nearbyParams = new URLSearchParams({ limit: NEARBY_PAGE_SIZE });
+                    nearbyCursor = null;
+                    const position = await getUserPosition();
+                    if (position) {
+                        nearbyParams.set('lat', position.lat);
+                        nearbyParams.set('lon', position.lon);
+                        yourPositionMarker.setLatLng([position.lat, position.lon]);
+                        yourPositionMarker.setPopupContent('<div style="text-align: center;"><h3 style="margin: 0; color: #333;">Your Position</h3></div>');
+                    }
+                }
+                
+                const params = new URLSearchParams(nearbyParams);
+                if (loadMore && nearbyCursor) {
+                    params.set('cursor', nearbyCursor);
+                }
                 
                 console.log('Fetching nearby locations...');
-                const response = await fetch('/get_nearby_locations');
+                const response = await fetch('/get_nearby_locations?' + params.toString());
                 const data = await response.json();
                 console.log('Received data:', data);
                 
                 if (response.ok) {
-                    if (data.length > 0) {
-                        nearbyContainer.innerHTML = data.map(location => {
-                            console.log('Processing location:', location);
-                            const locData = location.location_data || {};
-                            const name = locData.location_text 
-                                ? locData.location_text.replace('Found: ', '').replace('Found via geocoding: ', '')
-                                : 'Unknown Location';
-                            const address = locData.address || 'Address not available';
-                            const mapsUrl = locData.maps_url || '#';
-                            const instaUrl = location.instagram_url || '#';
-                            const distance = locData.distance ? locData.distance.toFixed(1) : null;
-                            
-                            return `
-                            <div class="nearby-card">
-                                <h4>${name}</h4>
-                                <p>${address}</p>
-                                ${mapsUrl !== '#' ? `<p><a href="${mapsUrl}" target="_blank">View on Maps</a></p>` : ''}
-                                ${instaUrl !== '#' ? `<p><a href="${instaUrl}" target="_blank">View Instagram Reel</a></p>` : ''}
-                                ${distance ? `<span class="nearby-distance">${distance} km away</span>` : ''}
-                            </div>
-                            `;
-                        }).join('');
+                    nearbyCursor = response.headers.get('X-Next-Cursor');
+                    moreBtn.style.display = nearbyCursor ? 'inline-block' : 'none';
+                    
+                    if (loadMore) {
+                        nearbyContainer.insertAdjacentHTML('beforeend', data.map(renderNearbyCard).join(''));
+                    } else if (data.length > 0) {
+                        nearbyContainer.innerHTML = data.map(renderNearbyCard).join('');
                     } else {
                         console.log('No nearby locations found');
                         nearbyContainer.innerHTML = '<p>No nearby locations found yet. Search for some locations first!</p>';
@@ -1498,13 +2083,15 @@ def index():
                 } else {
                     console.error('Error response:', data);
                     nearbyContainer.innerHTML = '<p>Error loading nearby locations. Please try again.</p>';
+                    moreBtn.style.display = 'none';
                 }
             } catch (error) {
                 console.error('Error loading nearby locations:', error);
                 nearbyContainer.innerHTML = '<p>Error loading nearby locations. Please try again.</p>';
+                moreBtn.style.display = 'none';
             } finally {
-                nearbyBtn.disabled = false;
-                nearbyBtn.innerHTML = '<i class="fas fa-location-arrow"></i> Show Nearby Locations';
+                activeBtn.disabled = false;
+                activeBtn.innerHTML = activeBtnHtml;
             }
         }
         
@@ -1537,9 +2124,48 @@ def test():
             "opencage": bool(OPENCAGE_API_KEY),
             "spacy_model": "en_core_web_sm loaded" if 'nlp' in globals() else "not loaded"
         },
-        "your_position": YOUR_POSITION
+        "your_position": YOUR_POSITION,
+        "caches": {
+            "maps_search": search_cache.stats(),
+            "place_details": place_details_cache.stats(),
+            "geocode": geocode_cache.stats(),
+            "reel_responses": reel_response_cache.stats(),
+            "captions": caption_cache.stats()
+        },
+        "http_pools": connection_stats(),
+        "providers": {name: guard.stats() for name, guard in provider_guards.items()},
+        "single_flight": reel_flights.stats(),
+        "yt_dlp_pools": extraction_stats(),
+        "extraction_strategies": strategy_stats.snapshot()
     })
 
+@app.route("/warm_place_details", methods=["POST"])
+def warm_place_details():
+    """Prefetch Places API details for a list of place_ids into the place details cache."""
+    data = request.get_json(silent=True) or {}
+    place_ids = data.get("place_ids")
+    if not isinstance(place_ids, list) or not place_ids:
+        return jsonify({"error": "place_ids must be a non-empty list"}), 400
+    if len(place_ids) > MAX_WARM_PLACE_IDS:
+        return jsonify({"error": f"At most {MAX_WARM_PLACE_IDS} place_ids per request"}), 400
+    return jsonify(warm_place_details_cache(place_ids))
+
+@app.route("/batch_geocode", methods=["POST"])
+def batch_geocode_route():
+    """Geocode a list of addresses, streaming one JSON line per distinct address as it resolves."""
+    data = request.get_json(silent=True) or {}
+    addresses = data.get("addresses")
+    if not isinstance(addresses, list) or not addresses:
+        return jsonify({"error": "addresses must be a non-empty list"}), 400
+    if len(addresses) > MAX_BATCH_GEOCODE_ADDRESSES:
+        return jsonify({"error": f"At most {MAX_BATCH_GEOCODE_ADDRESSES} addresses per request"}), 400
+
+    def generate():
+        for result in batch_geocode(addresses):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
 @app.route("/save_location", methods=["POST"])
 def save_location():
     """Endpoint to save location data to the database."""
@@ -1547,6 +2173,10 @@ def save_location():
         data = request.get_json()
         if not data or "instagram_url" not in data or "location_data" not in data:
             return jsonify({"error": "Invalid data format"}), 400
+        if not isinstance(data["instagram_url"], str) or not data["instagram_url"].strip():
+            return jsonify({"error": "instagram_url must be a non-empty string"}), 400
+        if not valid_coordinates(data["location_data"]):
+            return jsonify({"error": "Invalid coordinates"}), 400
         
         # Create the reel data structure
         reel_data = {
@@ -1554,14 +2184,7 @@ def save_location():
             "location_data": data["location_data"]
         }
         
-        # Calculate distance if coordinates are available
-        if (data["location_data"].get("lat") is not None and 
-            data["location_data"].get("lon") is not None):
-            reel_data["location_data"]["distance"] = calculate_distance(
-                YOUR_POSITION["lat"], YOUR_POSITION["lon"],
-                data["location_data"]["lat"], data["location_data"]["lon"]
-            )
-        
+        # save_to_database adds the timestamp and distance
         if save_to_database(reel_data):
             return jsonify({"status": "success"})
         else:
@@ -1573,23 +2196,26 @@ def save_location():
 
 @app.route("/get_nearby_locations")
 def get_nearby_locations_route():
-    """Endpoint to get locations near the fixed position."""
+    """Endpoint to get locations near lat/lon (defaults to the fixed position)."""
     try:
         max_distance = request.args.get("max_distance", default=50, type=float)
+        lat = request.args.get("lat", type=float)
+        lon = request.args.get("lon", type=float)
+        if (lat is None) != (lon is None) or (
+                lat is not None and not (-90 <= lat <= 90 and -180 <= lon <= 180)):
+            return jsonify({"error": "lat and lon must be given together as valid coordinates"}), 400
+        
+        limit = request.args.get("limit", type=int)
+        cursor = request.args.get("cursor")
+        if cursor and limit is None:
+            limit = DEFAULT_NEARBY_PAGE_SIZE
+        if limit is not None and not 1 <= limit <= MAX_NEARBY_PAGE_SIZE:
+            return jsonify({"error": f"limit must be between 1 and {MAX_NEARBY_PAGE_SIZE}"}), 400
         
-        # Print the current contents of the database file
         try:
-            with open(DATABASE_FILE, 'r') as f:
-                db_contents = json.load(f)
-                logger.info("Current database contents:")
-                logger.info(json.dumps(db_contents, indent=2))
-                print("\nCurrent database contents:")
-                print(json.dumps(db_contents, indent=2))
-        except Exception as e:
-            logger.error(f"Error reading database file: {e}")
-            print(f"Error reading database file: {e}")
-        
-        nearby = get_nearby_locations(max_distance)
+            nearby, next_cursor = get_nearby_locations(max_distance, lat, lon, limit, cursor)
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
         
         # Format the response to match what the frontend expects
         formatted_response = []
@@ -1604,191 +2230,24 @@ def get_nearby_locations_route():
         print("\nReturning nearby locations:")
         print(json.dumps(formatted_response, indent=2))
             
-        return jsonify(formatted_response)
+        response = jsonify(formatted_response)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
     except Exception as e:
         logger.error(f"Error getting nearby locations: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 @app.route("/get_location", methods=["POST"])
 def get_location():
     """Main endpoint for processing Instagram reel URLs and extracting locations."""
-    try:
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                "location_text": "Invalid request format",
-                "error": "JSON data required",
-                "lat": None, "lon": None, "maps_url": None,
-                "source": "request_error", "address": None
-            }), 400
-        
-        reel_url = data.get("reel_url", "").strip()
-        logger.info(f"Received URL: {reel_url}")
-
-        if not reel_url:
-            logger.error("No URL provided in request")
-            return jsonify({
-                "location_text": "No URL provided",
-                "error": "Instagram reel URL is required",
-                "lat": None, "lon": None, "maps_url": None,
-                "source": "validation_error", "address": None
-            }), 400
-
-        # Validate URL format
-        if not any(domain in reel_url for domain in ['instagram.com', 'serpapi.com']):
-            return jsonify({
-                "location_text": "Invalid URL format",
-                "error": "Please provide a valid Instagram reel URL or SerpAPI URL",
-                "lat": None, "lon": None, "maps_url": None,
-                "source": "validation_error", "address": None
-            }), 400
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify(location_error("Invalid request format", "JSON data required", "request_error")), 400
 
-        # Check if the URL is a SerpApi URL
-        serpapi_result = convert_serpapi_to_google_maps(reel_url)
-        if serpapi_result[0] is not None and serpapi_result[1] is not None:
-            maps_url, place_id = serpapi_result
-            try:
-                result = get_place_details_from_id(place_id, maps_url)
-                response = {
-                    "location_text": f"Found: {result['name']}",
-                    "lat": result["lat"],
-                    "lon": result["lon"], 
-                    "maps_url": finalize_maps_url(result["maps_url"]),
-                    "source": result["source"],
-                    "address": result["address"]
-                }
-                logger.info(f"SerpAPI processing complete - map link: {response['maps_url']}")
-                return jsonify(response)
-                
-            except Exception as e:
-                logger.error(f"Error processing SerpApi URL: {str(e)}")
-                return jsonify({
-                    "location_text": f"Could not process SerpAPI URL",
-                    "error": f"SerpAPI processing failed: {str(e)}",
-                    "lat": None, "lon": None,
-                    "maps_url": finalize_maps_url(maps_url),
-                    "source": "serpapi_error", "address": None
-                }), 422
-
-        # Process Instagram reel
-        try:
-            # Extract description without downloading video to avoid Instagram restrictions
-            description = extract_description(reel_url)
-            
-            if not description:
-                return jsonify({
-                    "location_text": "Could not extract description from Instagram reel",
-                    "error": "Instagram may be restricting access or the reel has no description. Try a different reel.",
-                    "lat": None, "lon": None, "maps_url": None,
-                    "source": "extraction_failed", "address": None
-                }), 422
-            
-            logger.info(f"Successfully extracted description: {description[:200]}...")
-            
-            # Parse description for location information
-            lines = description.splitlines()
-            location_block = None
-            business_name = extract_business_name(description)
-            
-            # Look for location keywords
-            location_keywords = ["location", "address", "place", "shop location", "📍", "🏠", "🏢", "🏪"]
-            
-            for i, line in enumerate(lines):
-                line_lower = line.strip().lower()
-                if any(keyword in line_lower for keyword in location_keywords):
-                    if ":" in line:
-                        location_block = line.split(":", 1)[1].strip()
-                    else:
-                        location_block = line.strip()
-                    
-                    # Collect continuation lines
-                    collected_lines = []
-                    for j in range(i + 1, len(lines)):
-                        next_line = lines[j].strip()
-                        if not next_line or next_line.startswith("#") or next_line.startswith("@"):
-                            break
-                        collected_lines.append(next_line)
-                    
-                    if collected_lines:
-                        location_block += " " + " ".join(collected_lines)
-                    break
-
-            # If no explicit location block found, use NLP extraction
-            if not location_block:
-                logger.info("No location block found, using NLP extraction")
-                location_names = extract_location_name(description)
-                if location_names:
-                    location_block = " ".join(location_names)
-                    logger.info(f"Using NLP extracted locations: {location_block}")
-                else:
-                    return jsonify({
-                        "location_text": "No location information found in reel description",
-                        "error": "The reel description doesn't contain recognizable location information",
-                        "lat": None, "lon": None, "maps_url": None,
-                        "source": "no_location_found", "address": None
-                    }), 422
-
-            # Clean and standardize the location block
-            cleaned_location = clean_location_block(location_block)
-            
-            # Search for the location using various APIs
-            search_result = google_maps_search(cleaned_location, business_name)
-            
-            if search_result and search_result.get("lat") and search_result.get("lon"):
-                final_maps_url = finalize_maps_url(search_result["maps_url"])
-                response = {
-                    "location_text": f"Found: {search_result['name']}",
-                    "lat": search_result["lat"],
-                    "lon": search_result["lon"],
-                    "maps_url": final_maps_url,
-                    "source": search_result["source"],
-                    "address": search_result.get("address", cleaned_location)
-                }
-                logger.info(f"Location search successful - map link: {final_maps_url}")
-                return jsonify(response)
-
-            # Fallback to geocoding if direct search fails
-            logger.info("Direct search failed, trying geocoding fallback")
-            lat, lon = get_coordinates_from_address(cleaned_location)
-            
-            if lat and lon:
-                fallback_maps_url = f"https://www.google.com/maps/search/?q={lat},{lon}&z=17"
-                response = {
-                    "location_text": f"Found via geocoding: {cleaned_location}",
-                    "lat": lat,
-                    "lon": lon,
-                    "maps_url": fallback_maps_url,
-                    "source": "geocoding_fallback",
-                    "address": cleaned_location
-                }
-                logger.info(f"Geocoding fallback successful - map link: {fallback_maps_url}")
-                return jsonify(response)
-
-            # No coordinates found anywhere
-            return jsonify({
-                "location_text": f"Location identified but coordinates not found: {cleaned_location}",
-                "error": "Could not determine precise coordinates for this location",
-                "lat": None, "lon": None, "maps_url": None,
-                "source": "coordinates_not_found",
-                "address": cleaned_location
-            }), 422
-
-        except Exception as processing_error:
-            logger.error(f"Error processing Instagram reel: {str(processing_error)}")
-            return jsonify({
-                "location_text": "Error processing Instagram reel",
-                "error": f"Processing failed: {str(processing_error)}",
-                "lat": None, "lon": None, "maps_url": None,
-                "source": "processing_error", "address": None
-            }), 500
-
-    except Exception as e:
-        logger.error(f"Unexpected error in get_location: {str(e)}")
-        return jsonify({
-            "location_text": "Internal server error",
-            "error": "An unexpected error occurred. Please try again.",
-            "lat": None, "lon": None, "maps_url": None,
-            "source": "server_error", "address": None
-        }), 500
+    reel_url = str(data.get("reel_url") or "").strip()
+    logger.info(f"Received URL: {reel_url}")
+    payload, status = resolve_reel_once(reel_url)
+    return jsonify(payload), status
 
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,443 @@
+import os
+import json
+import asyncio
+import logging
+import weakref
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+import app as reelbites
+from hedging import async_hedged_call
+from resilience import ProviderUnavailable
+from extraction import EmbedCaptionScanner, StrategyRace
+from http_client import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Connections the async client keeps open across all provider hosts
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.environ.get("ASYNC_HTTP_MAX_CONNECTIONS", "200"))
+ASYNC_HTTP_MAX_KEEPALIVE = int(os.environ.get("ASYNC_HTTP_MAX_KEEPALIVE", "50"))
+# yt-dlp extractions hold an extraction thread each, so only this many run at once per event loop
+MAX_CONCURRENT_EXTRACTIONS = int(os.environ.get("MAX_CONCURRENT_EXTRACTIONS", "16"))
+# Largest /get_location request body accepted
+MAX_REQUEST_BODY_BYTES = 64 * 1024
+
+
+# --- Per-Loop Resources ---
+class _LoopResources:
+    """HTTP client and extraction semaphore bound to one event loop."""
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=ASYNC_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=ASYNC_HTTP_MAX_KEEPALIVE,
+            ),
+            # Retries connection failures only; provider errors are handled by the hedged races
+            transport=httpx.AsyncHTTPTransport(retries=HTTP_RETRIES),
+        )
+        self.extractions = asyncio.Semaphore(MAX_CONCURRENT_EXTRACTIONS)
+
+
+_resources = weakref.WeakKeyDictionary()
+
+
+def _loop_resources():
+    loop = asyncio.get_running_loop()
+    resources = _resources.get(loop)
+    if resources is None:
+        resources = _resources[loop] = _LoopResources()
+    return resources
+
+
+def get_async_client():
+    """Return the shared httpx.AsyncClient for the running event loop."""
+    return _loop_resources().client
+
+
+async def close_async_client():
+    resources = _resources.pop(asyncio.get_running_loop(), None)
+    if resources is not None:
+        await resources.client.aclose()
+
+
+# --- Provider Guards ---
+async def guarded_call_async(provider, send, is_failure=None):
+    """Async version of guarded_call; send is a coroutine function.
+
+    A call cancelled by a hedged race records no outcome, it only frees the
+    breaker's half-open probe slot.
+    """
+    guard = reelbites.provider_guards[provider]
+    try:
+        guard.before_call()
+    except ProviderUnavailable as e:
+        logger.warning(f"Skipping provider: {e}")
+        return None
+    try:
+        response = await send()
+    except asyncio.CancelledError:
+        guard.release()
+        raise
+    except Exception:
+        guard.record_failure()
+        raise
+    guard.record_response(response.status_code, response.headers,
+                          failed=bool(is_failure and is_failure(response)))
+    return response
+
+
+# --- Extraction ---
+async def run_description_strategy(name, url, cancel):
+    """Run one in-process yt-dlp metadata strategy on an extraction thread; return the description or ''."""
+    async with _loop_resources().extractions:
+        return await asyncio.get_running_loop().run_in_executor(
+            reelbites.extraction_executor, reelbites.extract_strategy_description, name, url, cancel
+        )
+
+
+async def fetch_embed_caption_async(url):
+    """Async version of fetch_embed_caption; a cancelled task closes the stream."""
+    client = get_async_client()
+    request = client.build_request("GET", reelbites.embed_url_for(url), headers=reelbites.EMBED_HEADERS)
+    try:
+        response = await guarded_call_async("instagram_embed", lambda: client.send(request, stream=True))
+        if response is None:
+            return ""
+        try:
+            if response.status_code != 200:
+                return ""
+            scanner = EmbedCaptionScanner()
+            async for text in response.aiter_text():
+                if scanner.feed(text):
+                    break
+        finally:
+            await response.aclose()
+        return scanner.result() or ""
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Web scraping fallback failed: {e}")
+    return ""
+
+
+async def extract_description_async(url):
+    """Async version of extract_description: strategies raced in the order that has recently worked best.
+
+    A losing embed fetch is cancelled outright; a losing yt-dlp strategy stops
+    at its next request.
+    """
+    shortcode = reelbites.canonical_reel_key(url)
+    if shortcode:
+        cached = await asyncio.to_thread(reelbites.caption_cache.get, shortcode)
+        if cached is not None:
+            logger.info(f"Caption cache hit for {shortcode}")
+            return cached
+
+    race = StrategyRace()
+    strategies = {
+        name: lambda name=name: run_description_strategy(name, url, race.cancel)
+        for name, _ in reelbites.DESCRIPTION_STRATEGIES
+    }
+    strategies[reelbites.EMBED_STRATEGY] = lambda: fetch_embed_caption_async(url)
+    name = None
+    try:
+        name, description = await async_hedged_call(
+            [(name, race.track_async(name, strategies[name])) for name in reelbites.strategy_stats.plan()],
+            validate=bool,
+            hedge_delay=reelbites.DESCRIPTION_HEDGE_DELAY_SECONDS,
+            preference_window=0,
+            timeout=reelbites.DESCRIPTION_TIMEOUT_SECONDS,
+        )
+    finally:
+        race.finish(won=name is not None)
+    if name:
+        logger.info(f"Strategy '{name}' succeeded: extracted description")
+        if shortcode:
+            await asyncio.to_thread(reelbites.caption_cache.set, shortcode, description)
+        return description
+
+    logger.warning("Could not extract description from Instagram reel")
+    return ""
+
+
+# --- Providers ---
+async def search_google_places_async(query, search_query):
+    try:
+        headers, payload = reelbites.places_search_request(search_query)
+        response = await guarded_call_async("google_places", lambda: get_async_client().post(
+            reelbites.PLACES_SEARCH_URL, json=payload, headers=headers
+        ))
+        if response is not None:
+            return reelbites.parse_places_search(response.json(), query, search_query)
+    except Exception as e:
+        logger.error(f"Google Maps API search failed: {e}")
+    return None
+
+
+async def search_serpapi_maps_async(query, search_query):
+    try:
+        response = await guarded_call_async("serpapi", lambda: get_async_client().get(
+            reelbites.SERPAPI_SEARCH_URL, params=reelbites.serpapi_maps_params(search_query)
+        ))
+        if response is not None:
+            return reelbites.parse_serpapi_maps(response.json(), query, search_query)
+    except Exception as e:
+        logger.error(f"SerpAPI Google Maps search failed: {e}")
+    return None
+
+
+async def google_maps_search_async(query, business_name=None):
+    """Async version of google_maps_search, sharing its cache."""
+    search_query = reelbites.build_search_query(query, business_name)
+    cache_key = reelbites.search_cache_key(query, business_name)
+    cached = await asyncio.to_thread(reelbites.search_cache.get, cache_key)
+    if cached is not None:
+        logger.info(f"Maps search cache hit for: '{search_query}'")
+        return dict(cached)
+
+    logger.info(f"Searching Google Maps for: '{search_query}'")
+    _, result = await async_hedged_call(
+        [
+            ("google_maps_api", lambda: search_google_places_async(query, search_query)),
+            ("serpapi", lambda: search_serpapi_maps_async(query, search_query)),
+        ],
+        validate=reelbites.has_coordinates,
+    )
+    if reelbites.has_coordinates(result):
+        await asyncio.to_thread(reelbites.search_cache.set, cache_key, result)
+    return result
+
+
+async def geocode_opencage_async(refined_address):
+    try:
+        response = await guarded_call_async("opencage", lambda: get_async_client().get(
+            reelbites.OPENCAGE_GEOCODE_URL, params=reelbites.opencage_params(refined_address)
+        ))
+        if response is not None:
+            return reelbites.parse_opencage(response.json())
+    except Exception as e:
+        logger.error(f"OpenCage geocoding error: {e}")
+    return None
+
+
+async def geocode_google_async(refined_address):
+    try:
+        response = await guarded_call_async(
+            "google_geocoding",
+            lambda: get_async_client().get(reelbites.google_geocode_url(refined_address)),
+            is_failure=reelbites.google_geocode_failed,
+        )
+        if response is not None:
+            return reelbites.parse_google_geocode(response.json())
+    except Exception as e:
+        logger.error(f"Google Maps Geocoding error: {e}")
+    return None
+
+
+async def get_coordinates_from_address_async(address):
+    """Async version of get_coordinates_from_address."""
+    if not address:
+        return None, None
+    key = reelbites.address_key(address)
+    cached = await asyncio.to_thread(reelbites.geocode_cache.get, key)
+    if cached is not None:
+        logger.info(f"Geocode cache hit for: '{address}'")
+        return tuple(cached)
+
+    refined_address = reelbites.canonical_address(address)
+    logger.info(f"Geocoding refined address: '{refined_address}'")
+    _, coordinates = await async_hedged_call(
+        [
+            ("opencage", lambda: geocode_opencage_async(refined_address)),
+            ("google_geocoding", lambda: geocode_google_async(refined_address)),
+        ],
+    )
+    if coordinates:
+        await asyncio.to_thread(reelbites.geocode_cache.set, key, list(coordinates))
+    return coordinates or (None, None)
+
+
+async def resolve_coordinates_async(cleaned_location, business_name=None):
+    """Async version of resolve_coordinates."""
+    async def search():
+        result = await google_maps_search_async(cleaned_location, business_name)
+        return result if result and result.get("lat") and result.get("lon") else None
+
+    async def geocode():
+        lat, lon = await get_coordinates_from_address_async(cleaned_location)
+        return (lat, lon) if lat and lon else None
+
+    return await async_hedged_call(
+        [("search", search), ("geocode", geocode)],
+        hedge_delay=reelbites.GEOCODE_HEDGE_DELAY_SECONDS,
+    )
+
+
+async def get_place_details_from_id_async(place_id, fallback_maps_url):
+    """Async version of get_place_details_from_id, sharing the place details cache."""
+    try:
+        record = await asyncio.to_thread(reelbites.place_details_cache.get, place_id)
+        if record is None:
+            url, headers = reelbites.place_details_request(place_id)
+            response = await guarded_call_async(
+                "google_place_details", lambda: get_async_client().get(url, headers=headers)
+            )
+            if response is None:
+                raise ProviderUnavailable("Places API place details is unavailable")
+            response.raise_for_status()
+            record = await asyncio.to_thread(reelbites.remember_place_details, place_id, response.json())
+        else:
+            logger.info(f"Place details cache hit for place_id {place_id}")
+        return reelbites.place_details_from_record(record, fallback_maps_url)
+    except Exception as e:
+        logger.error(f"Error fetching place details for place_id {place_id}: {e}")
+    return reelbites.place_details_fallback(fallback_maps_url)
+
+
+# --- Pipeline ---
+async def resolve_reel_async(reel_url):
+    """Async version of resolve_reel: returns (payload, HTTP status) without blocking the event loop."""
+    try:
+        invalid = reelbites.validate_reel_url(reel_url)
+        if invalid:
+            return invalid
+
+        maps_url, place_id = reelbites.convert_serpapi_to_google_maps(reel_url)
+        if maps_url is not None and place_id is not None:
+            try:
+                result = await get_place_details_from_id_async(place_id, maps_url)
+                return reelbites.place_details_payload(result), 200
+            except Exception as e:
+                return reelbites.serpapi_error_payload(maps_url, e), 422
+
+        try:
+            description = await extract_description_async(reel_url)
+            if not description:
+                return reelbites.location_error(*reelbites.EXTRACTION_FAILED), 422
+            logger.info(f"Successfully extracted description: {description[:200]}...")
+
+            # spaCy is CPU-bound, so NER runs off the event loop
+            business_name = await asyncio.to_thread(reelbites.extract_business_name, description)
+            location_block = reelbites.find_location_block(description)
+            if not location_block:
+                logger.info("No location block found, using NLP extraction")
+                location_names = await asyncio.to_thread(reelbites.extract_location_name, description)
+                if not location_names:
+                    return reelbites.location_error(*reelbites.NO_LOCATION_FOUND), 422
+                location_block = " ".join(location_names)
+                logger.info(f"Using NLP extracted locations: {location_block}")
+
+            cleaned_location = reelbites.clean_location_block(location_block)
+            tier, resolved = await resolve_coordinates_async(cleaned_location, business_name)
+            return reelbites.coordinates_payload(tier, resolved, cleaned_location)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as processing_error:
+            return reelbites.processing_error_payload(processing_error), 500
+
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        return reelbites.server_error_payload(e), 500
+
+
+async def resolve_reel_once_async(reel_url):
+    """Async version of resolve_reel_once (a stale entry is refreshed on the sync refresh pool)."""
+    key = reelbites.reel_flight_key(reel_url)
+    if key is None:
+        return await resolve_reel_async(reel_url)
+    cached = await asyncio.to_thread(reelbites.cached_reel_response, reel_url, key)
+    if cached is not None:
+        return cached
+
+    async def resolve_and_remember():
+        payload, status = await resolve_reel_async(reel_url)
+        return await asyncio.to_thread(reelbites.remember_reel_response, key, payload, status)
+
+    return await reelbites.reel_flights.do_async(key, resolve_and_remember)
+
+
+# --- ASGI Application ---
+flask_asgi = WsgiToAsgi(reelbites.app)
+
+
+async def send_json(send, payload, status):
+    body = reelbites.app.json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def read_body(receive):
+    """Read the request body; return None if it is larger than MAX_REQUEST_BODY_BYTES.
+
+    Raises ConnectionError if the client goes away first.
+    """
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionError("Client disconnected")
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_REQUEST_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def get_location_endpoint(scope, receive, send):
+    """Native async POST /get_location; same request and response format as the Flask route."""
+    try:
+        body = await read_body(receive)
+    except ConnectionError:
+        return
+    if body is None:
+        payload = reelbites.location_error("Request too large", "Request body is too large", "request_error")
+        await send_json(send, payload, 413)
+        return
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or not data:
+        payload = reelbites.location_error("Invalid request format", "JSON data required", "request_error")
+        await send_json(send, payload, 400)
+        return
+
+    reel_url = str(data.get("reel_url") or "").strip()
+    logger.info(f"Received URL: {reel_url}")
+    payload, status = await resolve_reel_once_async(reel_url)
+    await send_json(send, payload, status)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_async_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI entry point (uvicorn asgi:application).
+
+    POST /get_location runs the async pipeline; every other route is served
+    by the Flask app through WsgiToAsgi.
+    """
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    elif scope["type"] == "http" and scope["path"] == "/get_location" and scope["method"] == "POST":
+        await get_location_endpoint(scope, receive, send)
+    else:
+        await flask_asgi(scope, receive, send)
@@ -0,0 +1,135 @@
+"""Measure lookup-cache hit rates before and after canonical address keys.
+
+Every corpus entry is looked up the way the app does it: the reel pipeline
+cleans the caption's location block and hits the search and geocode caches,
+and /batch_geocode hits the geocode cache with the raw text. A key that was
+already seen counts as a hit (cold, unbounded cache).
+
+Usage: python bench_address_cache.py
+"""
+import re
+from addresses import canonical_address, address_key
+from caching import normalize_search_query
+
+# The same places written the ways captions and saved addresses write them
+CORPUS = [
+    "Kaloor, Kochi",
+    "kaloor , kochi",
+    "Kaloor, Ernakulam, Kochi, Kerala 682025, India",
+    "Kaloor, Kochi, Kerala, 682025",
+    "Kaloor, Cochin",
+    "Kaloor Kochi Kerala",
+    "Kaloor​, Kochi - 682 025",
+    "Khaja Makkani, Puthiya Rd, Kaloor, Kochi",
+    "Khaja Makkani, Puthiya Rd, Kaloor, Ernakulam, Kochi, Kerala 682032",
+    "khaja makkani,puthiya rd,kaloor,kochi,kerala,682032",
+    "Khaja Makkani, Puthiya Rd, Kaloor, Kochi, Kerala 682032, India",
+    "Vaduthala, Kochi",
+    "Kotheri Rd, Vaduthala, Kochi, Ernakulam, Kerala 682023, India",
+    "Kotheri Rd, Vaduthala, Kochi, Kerala 682023",
+    "Kotheri Rd, Vaduthala Kochi Kerala 682023",
+    "Kotheri Rd, Vaduthala, Cochin, Kerala, 682023",
+    "George Chettan’s Puttu Kada, Vaduthala",
+    "George Chettan's Puttu Kada, Vaduthala, Kochi",
+    "Mulavukad, Ernakulam",
+    "Mulavukad, Kochi, Kerala",
+    "Mulavukad Ernakulam",
+    "National Highway 966A, Mulavukad, Kochi, Kerala 682504",
+    "National Highway 966A, Mulavukad, Ernakulam, Kochi, Kerala 682504",
+    "Palarivattom",
+    "Palarivattom, Kochi",
+    "Palarivattom, Kochi, Kerala",
+    "Palarivattom Kochi Kerala India",
+    "Palarivattom, Ernakulam, Kerala, India",
+    "Chakkalakkal, Palarivattom, Kochi, Kerala 682025",
+    "Chakkalakkal, Palarivattom, Ernakulam, Kochi, Kerala 682025",
+    "Fort Kochi",
+    "Fort Kochi, Kochi, Kerala",
+    "Fort Kochi, Kerala, 682001",
+    "Fort Kochi Kerala 682001",
+    "Princess Street, Fort Kochi, Kerala 682001, India",
+    "Princess St, Fort Kochi, Kochi, Kerala 682001",
+    "Marine Drive, Kochi",
+    "Marine Drive Kochi",
+    "Marine Drive, Ernakulam, Kerala",
+    "Marine Drive, Kochi, Kerala 682031",
+    "MG Road, Kochi",
+    "MG Road Kochi",
+    "MG Road Ernakulam Kerala",
+    "M.G. Road, Kochi, Kerala",
+    "MG Road, Ernakulam, Kochi, Kerala, India",
+    "321, Md Tayabulla Rd, Dighalipukhuri, Guwahati, Assam 781001",
+    "321, Md Tayabulla Rd, Dighalipukhuri, Guwahati, Assam 781001, India",
+]
+
+
+# --- Lookup keys before canonical addresses ---
+def legacy_clean_location_block(location_block):
+    cleaned = re.sub(r'@\w+\.\w+', '', location_block).strip()
+    cleaned = re.sub(r'@\w+', '', cleaned).strip()
+    cleaned = re.sub(r'371302', '682025', cleaned).strip()
+    cleaned = re.sub(r'\s*,\s*', ', ', cleaned).strip(', ')
+    if "Kochi" not in cleaned and "Kerala" not in cleaned:
+        cleaned += ", Kochi, Kerala, 682025"
+    elif "Kochi" in cleaned and "Kerala" not in cleaned:
+        cleaned += ", Kerala, 682025"
+    elif "Kerala" in cleaned and "682025" not in cleaned:
+        cleaned += ", 682025"
+    return re.sub(r'\s+', ' ', cleaned).strip()
+
+
+def legacy_refine_address(address):
+    parts = address.split(", ")
+    refined = ", ".join(part for part in parts if part not in ["India", "Ernakulam"])
+    if "Kochi" not in refined and "Kerala" not in refined:
+        refined += ", Kochi, Kerala, 682025"
+    return refined
+
+
+def legacy_lookups(text):
+    cleaned = legacy_clean_location_block(text)
+    return {
+        "search": [normalize_search_query(cleaned)],
+        "geocode": [normalize_search_query(cleaned), normalize_search_query(text)],
+        "provider_queries": [cleaned, legacy_refine_address(cleaned), legacy_refine_address(text)],
+    }
+
+
+# --- Lookup keys with canonical addresses ---
+def canonical_lookups(text):
+    return {
+        "search": [address_key(text)],
+        "geocode": [address_key(text), address_key(text)],
+        "provider_queries": [canonical_address(text)] * 3,
+    }
+
+
+def simulate(lookups):
+    seen = {"search": set(), "geocode": set()}
+    hits = {"search": 0, "geocode": 0}
+    total = {"search": 0, "geocode": 0}
+    provider_queries = set()
+    for text in CORPUS:
+        keys = lookups(text)
+        for cache in ("search", "geocode"):
+            for key in keys[cache]:
+                total[cache] += 1
+                hits[cache] += key in seen[cache]
+                seen[cache].add(key)
+        provider_queries.update(keys["provider_queries"])
+    return {cache: hits[cache] / total[cache] for cache in hits}, {cache: len(seen[cache]) for cache in seen}, \
+        len(provider_queries)
+
+
+def main():
+    print(f"{len(CORPUS)} addresses\n")
+    print(f"{'':>10} {'search hit rate':>16} {'geocode hit rate':>17} {'search keys':>12} "
+          f"{'geocode keys':>13} {'provider queries':>17}")
+    for label, lookups in (("before", legacy_lookups), ("after", canonical_lookups)):
+        rates, keys, queries = simulate(lookups)
+        print(f"{label:>10} {rates['search']:>16.1%} {rates['geocode']:>17.1%} {keys['search']:>12} "
+              f"{keys['geocode']:>13} {queries:>17}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Per-reel metadata latency: one yt-dlp subprocess per reel vs the in-process YoutubeDL pool.
+
+Usage: python bench_extraction.py [reel_url ...] [> bench_output.txt]
+
+Without arguments the reels saved in data.json are used. Both paths run the
+basic strategy; a failed extraction (e.g. Instagram asking for a login) is
+timed the same way, since that is what a request pays too.
+"""
+import json
+import statistics
+import subprocess
+import sys
+import time
+from extraction import extract_strategy_description, description_pools
+
+SUBPROCESS_TIMEOUT = 30
+
+
+def saved_reel_urls(path="data.json"):
+    with open(path, "r", encoding="utf-8") as f:
+        reels = json.load(f).get("reels", [])
+    return list(dict.fromkeys(reel["instagram_url"] for reel in reels if reel.get("instagram_url")))
+
+
+def subprocess_description(url):
+    result = subprocess.run(
+        ["yt-dlp", "--dump-json", "--no-download", "--ignore-errors", url],
+        capture_output=True, text=True, timeout=SUBPROCESS_TIMEOUT,
+    )
+    if result.returncode == 0 and result.stdout:
+        return json.loads(result.stdout).get("description", "")
+    return ""
+
+
+def in_process_description(url):
+    try:
+        return extract_strategy_description("basic", url)
+    except Exception:
+        return ""
+
+
+def timed(fn, url):
+    start = time.perf_counter()
+    description = fn(url)
+    return time.perf_counter() - start, bool(description)
+
+
+def report(label, timings):
+    seconds = [elapsed for elapsed, _ in timings]
+    found = sum(ok for _, ok in timings)
+    print(f"{label:>22} {statistics.median(seconds) * 1000:>10.0f} {max(seconds) * 1000:>10.0f} "
+          f"{found:>6}/{len(timings)}")
+
+
+def main():
+    urls = sys.argv[1:] or saved_reel_urls()
+    print(f"{len(urls)} reels\n")
+    print(f"{'':>22} {'median ms':>10} {'max ms':>10} {'found':>8}")
+    report("subprocess per reel", [timed(subprocess_description, url) for url in urls])
+    # The first call pays YoutubeDL construction; the rest reuse the warm instance
+    cold = [timed(in_process_description, urls[0])]
+    report("in-process (cold)", cold)
+    report("in-process (warm)", [timed(in_process_description, url) for url in urls])
+    print(f"\npool: {description_pools['basic'].stats()}")
+
+
+if __name__ == "__main__":
+    main()
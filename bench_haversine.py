@@ -0,0 +1,46 @@
+"""Benchmark the scalar calculate_distance loop against the vectorized haversine kernels.
+
+Usage: python bench_haversine.py [> bench_output.txt]
+"""
+import time
+import numpy as np
+from geo import calculate_distance, haversine_np, within_radius_np
+
+# TinkerSpace, Kochi
+ORIGIN_LAT, ORIGIN_LON = 10.0466152, 76.3341462
+RADIUS_KM = 50
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    rng = np.random.default_rng(42)
+    print(f"{'points':>10} {'scalar loop':>12} {'haversine_np':>13} {'speedup':>8} {'filter+sort':>14}")
+    for n in SIZES:
+        # Mostly around Kerala with a sprinkling of far-away places
+        lats = np.concatenate([rng.normal(ORIGIN_LAT, 1.0, n - n // 10), rng.uniform(-60, 60, n // 10)])
+        lons = np.concatenate([rng.normal(ORIGIN_LON, 1.0, n - n // 10), rng.uniform(-180, 180, n // 10)])
+        lat_list, lon_list = lats.tolist(), lons.tolist()
+
+        scalar_time, scalar = timed(
+            lambda: [calculate_distance(ORIGIN_LAT, ORIGIN_LON, la, lo) for la, lo in zip(lat_list, lon_list)],
+            repeat=1,
+        )
+        vector_time, vector = timed(lambda: haversine_np(ORIGIN_LAT, ORIGIN_LON, lats, lons))
+        filter_time, _ = timed(lambda: within_radius_np(ORIGIN_LAT, ORIGIN_LON, lats, lons, RADIUS_KM))
+
+        assert np.allclose(scalar, vector, atol=1e-6)
+        print(f"{n:>10,} {scalar_time * 1000:>10.1f}ms {vector_time * 1000:>11.1f}ms "
+              f"{scalar_time / vector_time:>7.1f}x {filter_time * 1000:>12.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
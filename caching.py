@@ -0,0 +1,255 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# On-disk cache shared by all workers (override with LOOKUP_CACHE_FILE)
+LOOKUP_CACHE_FILE = os.environ.get("LOOKUP_CACHE_FILE", "lookup_cache.db")
+# Each worker counts a cache's entries once per this many writes, so a cache can run
+# over max_entries by at most this many entries per worker before it is trimmed back
+EVICT_CHECK_EVERY = 100
+# Memory-front hits are written back to the database's last_used in batches of this many
+# keys (and before every eviction pass), so hot keys don't look idle to other workers
+RECENCY_FLUSH_EVERY = 100
+
+
+# --- Key Normalization ---
+def normalize_search_query(query):
+    """Normalize a place search so trivially different spellings share a cache entry.
+
+    Case, repeated whitespace and spacing around commas don't change what
+    Google returns for "Khaja Makkani, Kochi".
+    """
+    if not query:
+        return ""
+    query = re.sub(r"\s+", " ", query).strip().casefold()
+    query = re.sub(r"\s*,\s*", ", ", query)
+    return query.strip(" ,")
+
+
+# --- Persistent TTL/LRU Cache ---
+class PersistentTTLCache:
+    """SQLite-backed key/value cache with expiry and size-bounded LRU eviction.
+
+    Values must be JSON-serializable. A small in-process LRU sits in front of
+    the database so repeat lookups in one worker never touch disk; the database
+    survives restarts and is shared by every worker. Several caches can share
+    one file, each under its own namespace.
+    """
+
+    def __init__(self, db_path, namespace, ttl_seconds, max_entries, memory_entries=256):
+        self.db_path = str(db_path)
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._local = threading.local()
+        # Zero so a worker's first write trims whatever the previous run left over
+        self._writes_until_evict_check = 0
+        # Keys served from the memory front since the last recency flush, with when they were used
+        self._touched = {}
+        self._stats = {"hits": 0, "memory_hits": 0, "misses": 0, "expired": 0, "evictions": 0, "writes": 0}
+        self.initialize()
+
+    def _connect(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def initialize(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_entries_last_used ON cache_entries (namespace, last_used)"
+            )
+
+    def _count(self, name):
+        with self._memory_lock:
+            self._stats[name] += 1
+
+    def get(self, key):
+        """Return the cached value for key, or None if it is missing or expired."""
+        now = time.time()
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    self._touched[key] = now
+                    flush = len(self._touched) >= RECENCY_FLUSH_EVERY
+                else:
+                    del self._memory[key]
+                    entry = None
+        if entry is not None:
+            if flush:
+                self._flush_recency()
+            return value
+
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is not None and row[1] <= now:
+                self._count("expired")
+                with conn:
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                        (self.namespace, key, now),
+                    )
+                row = None
+            if row is None:
+                self._count("misses")
+                return None
+            # Hits from the memory front that follow are recorded in batches by _write_recency
+            with conn:
+                conn.execute(
+                    "UPDATE cache_entries SET last_used = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key),
+                )
+            value = json.loads(row[0])
+        except Exception as e:
+            logger.error(f"Error reading {self.namespace} cache entry '{key}': {e}")
+            self._count("misses")
+            return None
+
+        self._remember(key, value, row[1])
+        self._count("hits")
+        return value
+
+    def reload(self, key):
+        """Like get, but skip this worker's memory front: another worker may have replaced the entry."""
+        with self._memory_lock:
+            self._memory.pop(key, None)
+        return self.get(key)
+
+    def set(self, key, value, ttl_seconds=None):
+        """Store value under key for ttl_seconds (default: the cache's TTL)."""
+        now = time.time()
+        expires_at = now + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._memory_lock:
+            check_size = self._writes_until_evict_check <= 0
+            self._writes_until_evict_check = EVICT_CHECK_EVERY - 1 if check_size else self._writes_until_evict_check - 1
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, key, json.dumps(value, ensure_ascii=False), expires_at, now),
+                )
+                if check_size:
+                    # Eviction orders by last_used, so it must see the hits this worker served from memory
+                    self._write_recency(conn)
+                    evicted = self._evict(conn)
+                else:
+                    evicted = 0
+        except Exception as e:
+            logger.error(f"Error writing {self.namespace} cache entry '{key}': {e}")
+            return
+        self._remember(key, value, expires_at)
+        with self._memory_lock:
+            self._stats["writes"] += 1
+            self._stats["evictions"] += evicted
+
+    def _flush_recency(self):
+        try:
+            conn = self._connect()
+            with conn:
+                self._write_recency(conn)
+        except Exception as e:
+            logger.error(f"Error recording {self.namespace} cache recency: {e}")
+
+    def _write_recency(self, conn):
+        # Caller holds a write transaction on conn
+        with self._memory_lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            conn.executemany(
+                "UPDATE cache_entries SET last_used = ? WHERE namespace = ? AND key = ? AND last_used < ?",
+                [(used, self.namespace, key, used) for key, used in touched.items()],
+            )
+
+    def _evict(self, conn):
+        # Caller holds a write transaction on conn
+        count = conn.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        # Expired entries go first, then the least recently used ones
+        conn.execute("""
+            DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                SELECT key FROM cache_entries WHERE namespace = ?
+                ORDER BY expires_at > ?, last_used LIMIT ?
+            )
+        """, (self.namespace, self.namespace, time.time(), excess))
+        return excess
+
+    def _remember(self, key, value, expires_at):
+        with self._memory_lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def delete(self, key):
+        with self._memory_lock:
+            self._memory.pop(key, None)
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+        except Exception as e:
+            logger.error(f"Error deleting {self.namespace} cache entry '{key}': {e}")
+
+    def clear(self):
+        with self._memory_lock:
+            self._memory.clear()
+            self._touched.clear()
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def stats(self):
+        """Return this worker's hit/miss counters plus the current cache sizes."""
+        with self._memory_lock:
+            stats = dict(self._stats, memory_entries=len(self._memory))
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+        try:
+            stats["entries"] = self._connect().execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+        except Exception as e:
+            logger.error(f"Error counting {self.namespace} cache entries: {e}")
+        stats.update(ttl_seconds=self.ttl_seconds, max_entries=self.max_entries)
+        return stats
@@ -0,0 +1,259 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import logging
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC, 8-byte aligned sections, JSON header, footer (header length + MAGIC)
+COLUMNAR_MAGIC = b"REELCOL1"
+_FOOTER = struct.Struct("<Q8s")
+
+# Reel fields stored as indexes into interned string tables
+TOP_LEVEL_STRING_FIELDS = {"instagram_url": "urls", "timestamp": "texts"}
+LOCATION_STRING_FIELDS = {
+    "location_text": "texts",
+    "address": "addresses",
+    "maps_url": "urls",
+    "source": "sources",
+}
+
+# String index markers for a field that is None / absent in the original reel
+NONE_INDEX = -1
+MISSING_INDEX = -2
+
+
+# --- Writer ---
+def write_temp_columnar_snapshot(target_path, reels, keys, source_signature):
+    """Write reels in columnar form next to target_path and return the temp file path.
+
+    keys are the reels' store keys (one per reel, unique); source_signature is
+    the stat signature of the JSON snapshot these columns mirror.
+    """
+    target_path = Path(target_path)
+    tables = {}
+
+    def intern(table, value):
+        strings = tables.setdefault(table, {})
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    count = len(reels)
+    lats = np.full(count, np.nan)
+    lons = np.full(count, np.nan)
+    string_columns = {
+        field: np.full(count, MISSING_INDEX, dtype=np.int32)
+        for field in [*TOP_LEVEL_STRING_FIELDS, *LOCATION_STRING_FIELDS, "reel_key", "extra"]
+    }
+
+    def store_string(source, field, table, row):
+        # Move a None/str field out of source into its column; anything else stays for "extra"
+        if field not in source:
+            return
+        value = source[field]
+        if value is None:
+            string_columns[field][row] = NONE_INDEX
+        elif isinstance(value, str):
+            string_columns[field][row] = intern(table, value)
+        else:
+            return
+        del source[field]
+
+    for row, (reel, key) in enumerate(zip(reels, keys)):
+        string_columns["reel_key"][row] = intern("keys", key)
+        extra_reel = dict(reel)
+        extra = {}
+        if "location_data" in extra_reel:
+            extra_loc = dict(extra_reel.pop("location_data") or {})
+        else:
+            extra_loc = {}
+            extra["no_location_data"] = True
+        for field, table in TOP_LEVEL_STRING_FIELDS.items():
+            store_string(extra_reel, field, table, row)
+        for field, table in LOCATION_STRING_FIELDS.items():
+            store_string(extra_loc, field, table, row)
+        for field, column in (("lat", lats), ("lon", lons)):
+            value = extra_loc.get(field)
+            if value is None:
+                extra_loc.pop(field, None)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                column[row] = extra_loc.pop(field)
+        # Whatever doesn't fit a column round-trips through JSON
+        if extra_reel:
+            extra["reel"] = extra_reel
+        if extra_loc:
+            extra["location_data"] = extra_loc
+        if extra:
+            string_columns["extra"][row] = intern("texts", json.dumps(extra, ensure_ascii=False, sort_keys=True))
+
+    sections = []
+    header = {"version": 1, "count": count, "source": list(source_signature), "arrays": {}, "tables": {}}
+    offset = len(COLUMNAR_MAGIC)
+
+    def add_section(data):
+        nonlocal offset
+        padding = (-offset) % 8
+        sections.append(b"\0" * padding + data)
+        offset += padding
+        section_offset = offset
+        offset += len(data)
+        return section_offset
+
+    for name, array in [("lat", lats), ("lon", lons), *string_columns.items()]:
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+        header["arrays"][name] = [array.dtype.str, add_section(array.tobytes()), len(array)]
+    for table, strings in tables.items():
+        encoded = [value.encode("utf-8") for value in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        header["tables"][table] = [
+            add_section(offsets.tobytes()),
+            len(encoded),
+            add_section(b"".join(encoded)),
+        ]
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    fd, tmp_path = tempfile.mkstemp(dir=target_path.parent, prefix=target_path.name + ".", suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(COLUMNAR_MAGIC)
+        for section in sections:
+            f.write(section)
+        f.write(header_bytes)
+        f.write(_FOOTER.pack(len(header_bytes), COLUMNAR_MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+    os.chmod(tmp_path, 0o644)
+    return tmp_path
+
+
+# --- Reader ---
+class ColumnarSnapshot:
+    """Memory-mapped columnar reel snapshot: coordinate arrays are used in place, strings decoded on demand."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mmap
+        if len(mm) < len(COLUMNAR_MAGIC) + _FOOTER.size or mm[:len(COLUMNAR_MAGIC)] != COLUMNAR_MAGIC:
+            raise ValueError(f"{self.path} is not a columnar reel snapshot")
+        header_len, magic = _FOOTER.unpack(mm[-_FOOTER.size:])
+        if magic != COLUMNAR_MAGIC:
+            raise ValueError(f"{self.path} is truncated")
+        header_end = len(mm) - _FOOTER.size
+        header = json.loads(mm[header_end - header_len:header_end])
+        self.count = header["count"]
+        self.source_signature = tuple(header["source"])
+        self.arrays = {
+            name: np.frombuffer(mm, dtype=np.dtype(dtype), count=length, offset=array_offset)
+            for name, (dtype, array_offset, length) in header["arrays"].items()
+        }
+        self._tables = {
+            table: (np.frombuffer(mm, dtype="<i8", count=length + 1, offset=offsets_offset), blob_offset)
+            for table, (offsets_offset, length, blob_offset) in header["tables"].items()
+        }
+        self.lats = self.arrays["lat"]
+        self.lons = self.arrays["lon"]
+
+    def string(self, table, index):
+        offsets, blob_offset = self._tables[table]
+        start, end = int(offsets[index]), int(offsets[index + 1])
+        return self._mmap[blob_offset + start:blob_offset + end].decode("utf-8")
+
+    def _field(self, field, table, row, target):
+        index = int(self.arrays[field][row])
+        if index == NONE_INDEX:
+            target[field] = None
+        elif index != MISSING_INDEX:
+            target[field] = self.string(table, index)
+
+    def keys(self):
+        """Return the store key of every row, in row order."""
+        column = self.arrays["reel_key"]
+        return [self.string("keys", int(index)) for index in column]
+
+    def reel(self, row):
+        """Materialize one reel dict."""
+        extra_index = int(self.arrays["extra"][row])
+        extra = json.loads(self.string("texts", extra_index)) if extra_index >= 0 else {}
+        reel = {}
+        loc_data = {}
+        for field, table in TOP_LEVEL_STRING_FIELDS.items():
+            self._field(field, table, row, reel)
+        for field, table in LOCATION_STRING_FIELDS.items():
+            self._field(field, table, row, loc_data)
+        lat, lon = float(self.lats[row]), float(self.lons[row])
+        loc_data["lat"] = None if np.isnan(lat) else lat
+        loc_data["lon"] = None if np.isnan(lon) else lon
+        loc_data.update(extra.get("location_data", {}))
+        reel.update(extra.get("reel", {}))
+        if not extra.get("no_location_data"):
+            reel["location_data"] = loc_data
+        return reel
+
+
+def open_columnar_snapshot(path, source_signature):
+    """Return the ColumnarSnapshot at path if it mirrors the JSON snapshot with source_signature, else None."""
+    if source_signature is None or not os.path.exists(path):
+        return None
+    try:
+        snapshot = ColumnarSnapshot(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable columnar snapshot {path}: {e}")
+        return None
+    if snapshot.source_signature != tuple(source_signature):
+        return None
+    return snapshot
+
+
+class ColumnarReels:
+    """List-like view of a ColumnarSnapshot; rows become dicts only when accessed.
+
+    Supports the list operations ReelIndex needs: len, indexing, item
+    replacement and append. pending holds newer journal records that still
+    have to be applied on top of the snapshot.
+    """
+
+    def __init__(self, snapshot, pending=()):
+        self.snapshot = snapshot
+        self.pending = list(pending)
+        self._materialized = {}
+        self._appended = []
+
+    def __len__(self):
+        return self.snapshot.count + len(self._appended)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self)
+        if position >= self.snapshot.count:
+            return self._appended[position - self.snapshot.count]
+        reel = self._materialized.get(position)
+        if reel is None:
+            if not 0 <= position < self.snapshot.count:
+                raise IndexError(position)
+            reel = self._materialized[position] = self.snapshot.reel(position)
+        return reel
+
+    def __setitem__(self, position, reel):
+        if position >= self.snapshot.count:
+            self._appended[position - self.snapshot.count] = reel
+        else:
+            self._materialized[position] = reel
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+    def append(self, reel):
+        self._appended.append(reel)
+
+    def key_positions(self):
+        """Map each snapshot row's store key to its position."""
+        return {key: position for position, key in enumerate(self.snapshot.keys())}
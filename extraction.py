@@ -0,0 +1,366 @@
+import os
+import re
+import json
+import time
+import queue
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import yt_dlp
+
+logger = logging.getLogger(__name__)
+
+BROWSER_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# yt-dlp metadata strategies tried in order by the reel description extractors: (name, YoutubeDL options)
+DESCRIPTION_STRATEGIES = [
+    # Strategy 1: Basic metadata extraction
+    ("basic", {}),
+    # Strategy 2: With user agent
+    ("user_agent", {"http_headers": {"User-Agent": BROWSER_USER_AGENT}}),
+    # Strategy 3: With cookies (if available)
+    ("browser_cookies", {"cookiesfrombrowser": ("chrome",)}),
+]
+# The embed page scrape races the yt-dlp strategies under this name
+EMBED_STRATEGY = "embed_page"
+EXTRACTION_STRATEGY_NAMES = [name for name, _ in DESCRIPTION_STRATEGIES] + [EMBED_STRATEGY]
+
+# Per-request socket timeout (seconds) for metadata extraction; a strategy makes a few requests at most
+DESCRIPTION_SOCKET_TIMEOUT = float(os.environ.get("DESCRIPTION_SOCKET_TIMEOUT", "10"))
+# The strategies and the embed page scrape are raced: each next one starts this many seconds
+# after the previous (0 starts them all at once) or as soon as every running one has failed
+DESCRIPTION_HEDGE_DELAY_SECONDS = float(os.environ.get("DESCRIPTION_HEDGE_DELAY_SECONDS", "2"))
+# Upper bound on the whole race
+DESCRIPTION_TIMEOUT_SECONDS = float(os.environ.get("DESCRIPTION_TIMEOUT_SECONDS", "30"))
+# Extractions block on Instagram for seconds, so they get their own threads rather than the provider pool
+extraction_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("EXTRACTION_WORKERS", "32")), thread_name_prefix="extraction"
+)
+
+# Warm YoutubeDL instances kept per strategy, and how many extractions one serves before it is replaced
+YTDL_POOL_SIZE = int(os.environ.get("YTDL_POOL_SIZE", "4"))
+YTDL_MAX_USES = int(os.environ.get("YTDL_MAX_USES", "200"))
+
+BASE_OPTIONS = {
+    "quiet": True,
+    "no_warnings": True,
+    "noprogress": True,
+    "skip_download": True,
+    "socket_timeout": DESCRIPTION_SOCKET_TIMEOUT,
+    "extractor_retries": 1,
+    "logger": logging.getLogger("yt_dlp"),
+}
+
+
+# Outcomes remembered per strategy, and the attempt time assumed before a strategy has any
+STRATEGY_STATS_WINDOW = int(os.environ.get("STRATEGY_STATS_WINDOW", "50"))
+STRATEGY_DEFAULT_SECONDS = 3.0
+# A strategy succeeding less often than this over at least STRATEGY_SKIP_MIN_ATTEMPTS recent
+# attempts is left out of the race, except on every STRATEGY_PROBE_EVERY-th extraction
+STRATEGY_SKIP_BELOW = 0.05
+STRATEGY_SKIP_MIN_ATTEMPTS = 20
+STRATEGY_PROBE_EVERY = 20
+
+
+class ExtractionCancelled(yt_dlp.utils.DownloadCancelled):
+    """Raised inside a yt-dlp extraction whose result is no longer wanted (yt-dlp passes it through)."""
+    msg = "Extraction cancelled"
+
+
+class CancellableYoutubeDL(yt_dlp.YoutubeDL):
+    """YoutubeDL that gives up before its next HTTP request once cancel_event is set."""
+
+    cancel_event = None
+
+    def urlopen(self, req):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ExtractionCancelled()
+        return super().urlopen(req)
+
+
+# --- YoutubeDL Pool ---
+class YoutubeDLPool:
+    """Reusable YoutubeDL instances for one set of options.
+
+    Creating a YoutubeDL loads the extractor registry, cookies and HTTP
+    handlers; a pooled instance keeps all of that (and its open connections)
+    between reels. An instance is used by one thread at a time; when all are
+    busy a temporary one is created and thrown away afterwards.
+    """
+
+    def __init__(self, options, size=YTDL_POOL_SIZE, max_uses=YTDL_MAX_USES):
+        self.options = {**BASE_OPTIONS, **options}
+        self.size = size
+        self.max_uses = max_uses
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "reused": 0, "retired": 0, "discarded": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _create(self):
+        self._count("created")
+        return [CancellableYoutubeDL(dict(self.options)), 0]
+
+    def acquire(self):
+        try:
+            entry = self._idle.get_nowait()
+            self._count("reused")
+        except queue.Empty:
+            entry = self._create()
+        entry[1] += 1
+        return entry
+
+    def release(self, entry, healthy=True):
+        # Broken or worn-out instances are closed; the rest go back if there's room
+        if healthy and entry[1] < self.max_uses:
+            if self._idle.qsize() < self.size:
+                self._idle.put(entry)
+                return
+            self._count("discarded")
+        else:
+            self._count("retired")
+        _close(entry[0])
+
+    def extract_info(self, url, cancel=None):
+        """Return yt-dlp's metadata for url without downloading anything.
+
+        Setting the cancel event makes the extraction raise ExtractionCancelled
+        before its next request.
+        """
+        entry = self.acquire()
+        entry[0].cancel_event = cancel
+        healthy = True
+        try:
+            return entry[0].extract_info(url, download=False)
+        except (yt_dlp.utils.DownloadError, ExtractionCancelled):
+            # The extractor gave up on this URL (or was told to); the instance itself is fine
+            raise
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            entry[0].cancel_event = None
+            self.release(entry, healthy)
+
+    def close(self):
+        while True:
+            try:
+                _close(self._idle.get_nowait()[0])
+            except queue.Empty:
+                return
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, idle=self._idle.qsize(), size=self.size)
+
+
+def _close(ydl):
+    try:
+        ydl.close()
+    except Exception as e:
+        logger.warning(f"Error closing YoutubeDL instance: {e}")
+
+
+description_pools = {name: YoutubeDLPool(options) for name, options in DESCRIPTION_STRATEGIES}
+
+
+# --- Extraction ---
+def extract_strategy_description(name, url, cancel=None):
+    """Run one metadata strategy in-process; return the reel description or ''."""
+    try:
+        info = description_pools[name].extract_info(url, cancel)
+    except ExtractionCancelled:
+        logger.info(f"Strategy '{name}' cancelled for {url}")
+        return ""
+    except yt_dlp.utils.DownloadError as e:
+        logger.info(f"Strategy '{name}' could not extract {url}: {e}")
+        return ""
+    return (info or {}).get("description") or ""
+
+
+def download_video(url, output_path, options):
+    """Download url to output_path with a one-off YoutubeDL (output paths differ per call)."""
+    download_options = {**BASE_OPTIONS, "skip_download": False, "outtmpl": output_path, **options}
+    with yt_dlp.YoutubeDL(download_options) as ydl:
+        if ydl.download([url]):
+            raise yt_dlp.utils.DownloadError(f"yt-dlp could not download {url}")
+    return output_path
+
+
+# --- Strategy Ordering ---
+class StrategyStats:
+    """Rolling success rate and attempt time per extraction strategy, used to order the race.
+
+    Strategies are tried in order of successes per second spent (smoothed, so a
+    strategy without history starts at 50% and STRATEGY_DEFAULT_SECONDS),
+    which minimizes the expected time to the first description. Ties keep the
+    configured order.
+    """
+
+    def __init__(self, window=STRATEGY_STATS_WINDOW):
+        self._outcomes = {}
+        self._window = window
+        self._plans = 0
+        self._lock = threading.Lock()
+
+    def record(self, name, success, seconds):
+        with self._lock:
+            outcomes = self._outcomes.setdefault(name, deque(maxlen=self._window))
+            outcomes.append((success, seconds))
+
+    def _summary(self, name):
+        # Caller holds self._lock
+        outcomes = self._outcomes.get(name, ())
+        attempts = len(outcomes)
+        successes = sum(success for success, _ in outcomes)
+        seconds = sum(elapsed for _, elapsed in outcomes)
+        success_rate = (successes + 1) / (attempts + 2)
+        mean_seconds = (seconds + STRATEGY_DEFAULT_SECONDS) / (attempts + 1)
+        return {
+            "attempts": attempts,
+            "successes": successes,
+            "success_rate": round(success_rate, 3),
+            "mean_seconds": round(mean_seconds, 3),
+            "score": success_rate / mean_seconds,
+            "skipped": attempts >= STRATEGY_SKIP_MIN_ATTEMPTS and successes / attempts < STRATEGY_SKIP_BELOW,
+        }
+
+    def plan(self, names=EXTRACTION_STRATEGY_NAMES):
+        """Return the strategies to race for the next extraction, best first."""
+        with self._lock:
+            self._plans += 1
+            probe = self._plans % STRATEGY_PROBE_EVERY == 0
+            summaries = {name: self._summary(name) for name in names}
+        return _rank(summaries, probe)
+
+    def snapshot(self, names=EXTRACTION_STRATEGY_NAMES):
+        with self._lock:
+            summaries = {name: self._summary(name) for name in names}
+        for summary in summaries.values():
+            summary["score"] = round(summary["score"], 4)
+        return {"order": _rank(summaries, probe=False), "strategies": summaries}
+
+
+def _rank(summaries, probe):
+    ranked = sorted(summaries, key=lambda name: -summaries[name]["score"])
+    # Never skip everything; a probe run races every strategy so a recovery gets noticed
+    return [name for name in ranked if probe or not summaries[name]["skipped"]] or ranked
+
+
+strategy_stats = StrategyStats()
+
+
+class StrategyRace:
+    """Cancel event and outcome bookkeeping for one extraction race.
+
+    Every strategy's result is recorded in strategy_stats, except failures of
+    strategies that were cut short because another one had already won.
+    """
+
+    def __init__(self, stats=strategy_stats):
+        self.stats = stats
+        self.cancel = threading.Event()
+        self.won = False
+
+    def track(self, name, fn):
+        def run():
+            start = time.monotonic()
+            try:
+                result = fn()
+            except Exception:
+                self._record(name, False, start)
+                raise
+            self._record(name, bool(result), start)
+            return result
+        return run
+
+    def track_async(self, name, coro_fn):
+        async def run():
+            start = time.monotonic()
+            try:
+                result = await coro_fn()
+            except BaseException:
+                # Includes cancellation: the race ended while this strategy was still running
+                self._record(name, False, start)
+                raise
+            self._record(name, bool(result), start)
+            return result
+        return run
+
+    def _record(self, name, success, start):
+        if success or not (self.won and self.cancel.is_set()):
+            self.stats.record(name, success, time.monotonic() - start)
+
+    def finish(self, won):
+        """Stop the strategies still running; won tells whether any of them produced a description."""
+        self.won = won
+        self.cancel.set()
+
+
+# --- Embed Page Parsing ---
+EMBED_JSON_LD_PATTERN = re.compile(r'<script type="application/ld\+json">([^<]+)</script>')
+EMBED_META_DESCRIPTION_PATTERN = re.compile(r'<meta name="description" content="([^"]*)"')
+
+
+class EmbedCaptionScanner:
+    """Finds the caption in an embed page as its HTML arrives, so the download can stop early.
+
+    A JSON-LD caption ends the scan immediately. A JSON-LD block can come
+    anywhere in the page, so the meta description is only remembered as the
+    fallback once the whole page has been read. Each feed only rescans from
+    where an unfinished tag could start.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.caption = None
+        self.meta_caption = None
+        self._json_ld_from = 0
+        self._meta_from = 0
+
+    def feed(self, chunk):
+        """Add the next piece of decoded HTML; return True once the rest of the page isn't needed."""
+        self.text += chunk
+        while True:
+            match = EMBED_JSON_LD_PATTERN.search(self.text, self._json_ld_from)
+            if match is None:
+                break
+            self._json_ld_from = match.end()
+            caption = _json_ld_caption(match.group(1))
+            if caption:
+                self.caption = caption
+                return True
+        self._json_ld_from = _resume_at(self.text, "<script", self._json_ld_from)
+
+        if self.meta_caption is None:
+            match = EMBED_META_DESCRIPTION_PATTERN.search(self.text, self._meta_from)
+            if match is not None:
+                self.meta_caption = match.group(1)
+            else:
+                self._meta_from = _resume_at(self.text, "<meta", self._meta_from)
+        return False
+
+    def result(self):
+        return self.caption or self.meta_caption
+
+
+def _json_ld_caption(block):
+    try:
+        data = json.loads(block)
+    except ValueError:
+        return None
+    return data.get("caption") if isinstance(data, dict) else None
+
+
+def _resume_at(text, marker, start):
+    # A match can't begin before the last marker: anything earlier has already been ruled out
+    index = text.rfind(marker, start)
+    return index if index != -1 else max(start, len(text) - len(marker))
+
+
+def extraction_stats():
+    return {name: pool.stats() for name, pool in description_pools.items()}
@@ -0,0 +1,240 @@
+import math
+import itertools
+from collections import defaultdict
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+# Grid cell size for the spatial index (0.05 deg is roughly 5.5 km of latitude)
+GRID_CELL_DEG = 0.05
+
+# The equirectangular approximation is only trusted as a pre-filter up to this radius
+# and away from the poles; candidates are kept if they fall within radius * (1 + margin)
+EQUIRECT_PREFILTER_MAX_KM = 1000
+EQUIRECT_PREFILTER_MAX_LAT = 80
+EQUIRECT_PREFILTER_MARGIN = 0.05
+
+
+# --- Geometry Helpers ---
+def calculate_distance(lat1, lon1, lat2, lon2):
+    """Calculate distance between two coordinates in kilometers using Haversine formula."""
+    R = EARTH_RADIUS_KM
+    
+    dLat = math.radians(lat2 - lat1)
+    dLon = math.radians(lon2 - lon1)
+    
+    a = (math.sin(dLat / 2) * math.sin(dLat / 2)) + \
+        math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * \
+        (math.sin(dLon / 2) * math.sin(dLon / 2))
+    
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    distance = R * c
+    
+    return distance
+
+
+def bounding_box(lat, lon, radius_km):
+    """Return (min_lat, max_lat, min_lon, max_lon) enclosing a circle of radius_km around a point."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+
+    # Longitude degrees shrink towards the poles; fall back to the full range there
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-9:
+        return min_lat, max_lat, -180.0, 180.0
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    if dlon >= 180:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lon - dlon, lon + dlon
+
+
+# --- Vectorized Distance Kernels ---
+def haversine_np(lat, lon, lats, lons):
+    """Haversine distance in km from one point to arrays of points."""
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(lons, dtype=np.float64) - lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def equirectangular_np(lat, lon, lats, lons, cos_lat=None):
+    """Cheap equirectangular distance approximation in km; accurate for short distances.
+
+    cos_lat scales longitude differences; by default it is taken at each pair's mean latitude.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    if cos_lat is None:
+        cos_lat = np.cos(np.radians((lats + lat) / 2))
+    # Wrap longitude differences into [-180, 180)
+    dlon = (np.asarray(lons, dtype=np.float64) - lon + 180.0) % 360.0 - 180.0
+    return EARTH_RADIUS_KM * np.radians(np.hypot(dlon * cos_lat, lats - lat))
+
+
+def within_radius_np(lat, lon, lats, lons, radius_km, sort=True):
+    """Return (indices, distances_km) of points within radius_km, sorted by distance unless sort=False."""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    indices = np.arange(len(lats))
+    radius_deg = math.degrees(radius_km / EARTH_RADIUS_KM)
+    if radius_km <= EQUIRECT_PREFILTER_MAX_KM and abs(lat) + radius_deg <= EQUIRECT_PREFILTER_MAX_LAT:
+        # A single scale factor taken at the most poleward latitude in range can only
+        # underestimate, so the pre-filter never drops a true match
+        cos_lat = math.cos(math.radians(abs(lat) + radius_deg))
+        approx = equirectangular_np(lat, lon, lats, lons, cos_lat)
+        indices = indices[approx <= radius_km * (1 + EQUIRECT_PREFILTER_MARGIN) + 0.1]
+    distances = haversine_np(lat, lon, lats[indices], lons[indices])
+    keep = distances <= radius_km
+    indices, distances = indices[keep], distances[keep]
+    if not sort:
+        return indices, distances
+    order = np.argsort(distances, kind="stable")
+    return indices[order], distances[order]
+
+
+# --- Spatial Index ---
+class GeoGridIndex:
+    """Bucket points into fixed lat/lon grid cells so radius queries only scan nearby cells.
+
+    Coordinates live in contiguous float64 arrays (grown by doubling) so the
+    candidates from the touched cells are filtered with the vectorized kernels.
+    """
+
+    def __init__(self, cell_deg=GRID_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._cols = int(round(360 / cell_deg))
+        self.clear()
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg)) % self._cols
+
+    def add(self, item_id, lat, lon):
+        """Index a point under item_id, replacing any previous point for it."""
+        if item_id in self.slots:
+            self.remove(item_id)
+        if self._free_slots:
+            # Reuse a slot left by a removed point so re-saves don't grow the arrays
+            slot = self._free_slots.pop()
+        else:
+            if self._size == len(self.lats):
+                capacity = max(64, 2 * len(self.lats))
+                self.lats = np.resize(self.lats, capacity)
+                self.lons = np.resize(self.lons, capacity)
+                self.item_ids = np.resize(self.item_ids, capacity)
+            slot = self._size
+            self._size += 1
+        self.lats[slot] = lat
+        self.lons[slot] = lon
+        self.item_ids[slot] = item_id
+        self.cells[self._cell(lat, lon)].append(slot)
+        self.slots[item_id] = slot
+
+    def add_many(self, item_ids, lats, lons):
+        """Bulk-index new points (ids must not be indexed yet); rows with NaN coordinates are skipped."""
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        valid = ~(np.isnan(lats) | np.isnan(lons))
+        item_ids, lats, lons = item_ids[valid], lats[valid], lons[valid]
+        count = len(item_ids)
+        if not count:
+            return
+        start = self._size
+        if start + count > len(self.lats):
+            capacity = max(64, 2 * len(self.lats), start + count)
+            self.lats = np.resize(self.lats, capacity)
+            self.lons = np.resize(self.lons, capacity)
+            self.item_ids = np.resize(self.item_ids, capacity)
+        slots = np.arange(start, start + count)
+        self.lats[slots] = lats
+        self.lons[slots] = lons
+        self.item_ids[slots] = item_ids
+        self._size += count
+        # Group slots by grid cell with one sort instead of a dict lookup per point
+        rows = np.floor(lats / self.cell_deg).astype(np.int64)
+        cols = np.floor(lons / self.cell_deg).astype(np.int64) % self._cols
+        order = np.lexsort((cols, rows))
+        rows, cols, sorted_slots = rows[order], cols[order], slots[order]
+        boundaries = np.flatnonzero((np.diff(rows) != 0) | (np.diff(cols) != 0)) + 1
+        for bucket in np.split(np.arange(count), boundaries):
+            first = bucket[0]
+            self.cells[(int(rows[first]), int(cols[first]))].extend(sorted_slots[bucket].tolist())
+        self.slots.update(zip(item_ids.tolist(), slots.tolist()))
+
+    def remove(self, item_id):
+        """Drop item_id from the index if present; its array slot is reused by the next add."""
+        slot = self.slots.pop(item_id, None)
+        if slot is not None:
+            self.cells[self._cell(self.lats[slot], self.lons[slot])].remove(slot)
+            self._free_slots.append(slot)
+
+    def clear(self):
+        self.cells = defaultdict(list)
+        self.slots = {}
+        self.lats = np.empty(0, dtype=np.float64)
+        self.lons = np.empty(0, dtype=np.float64)
+        self.item_ids = np.empty(0, dtype=np.int64)
+        self._size = 0
+        self._free_slots = []
+
+    def _candidate_slots(self, lat, lon, radius_km):
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        rows = range(int(math.floor(min_lat / self.cell_deg)), int(math.floor(max_lat / self.cell_deg)) + 1)
+        first_col = int(math.floor(min_lon / self.cell_deg))
+        last_col = int(math.floor(max_lon / self.cell_deg))
+        if last_col - first_col + 1 >= self._cols:
+            cols = range(self._cols)
+        else:
+            # Wrap across the antimeridian
+            cols = [col % self._cols for col in range(first_col, last_col + 1)]
+        if len(rows) * len(cols) > len(self.cells):
+            # Huge radius: walking the occupied cells is cheaper than probing every cell in the box
+            cols = set(cols)
+            buckets = [bucket for (row, col), bucket in self.cells.items() if bucket and row in rows and col in cols]
+        else:
+            buckets = []
+            for row in rows:
+                for col in cols:
+                    bucket = self.cells.get((row, col))
+                    if bucket:
+                        buckets.append(bucket)
+        return np.fromiter(itertools.chain.from_iterable(buckets), dtype=np.int64)
+
+    def within(self, lat, lon, radius_km, limit=None, after=None):
+        """Return (distance_km, item_id) pairs for points within radius_km, closest first.
+
+        With limit only the closest `limit` points are selected and sorted; with
+        after=(distance_km, item_id) only points ordered after it are considered.
+        """
+        slots = self._candidate_slots(lat, lon, radius_km)
+        indices, distances = within_radius_np(
+            lat, lon, self.lats[slots], self.lons[slots], radius_km, sort=False
+        )
+        item_ids = self.item_ids[slots[indices]]
+        if after is not None:
+            after_distance, after_id = after
+            keep = (distances > after_distance) | ((distances == after_distance) & (item_ids > after_id))
+            distances, item_ids = distances[keep], item_ids[keep]
+        if limit is not None and limit < len(distances):
+            # Partial selection: keep the `limit` smallest (plus ties) before sorting
+            kth = np.partition(distances, limit - 1)[limit - 1]
+            keep = distances <= kth
+            distances, item_ids = distances[keep], item_ids[keep]
+        order = np.lexsort((item_ids, distances))[:limit]
+        return list(zip(distances[order].tolist(), item_ids[order].tolist()))
+
+    def nearest(self, lat, lon, k=1):
+        """Return the k closest (distance_km, item_id) pairs, closest first."""
+        if not self.slots:
+            return []
+        # Grow the search radius until it holds k points; everything closer is then inside it
+        radius_km = self.cell_deg * 111.0
+        while True:
+            matches = self.within(lat, lon, radius_km)
+            if len(matches) >= k or radius_km >= math.pi * EARTH_RADIUS_KM:
+                return matches[:k]
+            radius_km *= 2
@@ -0,0 +1,170 @@
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+# Seconds before the next provider in line is started if no acceptable answer has arrived
+HEDGE_DELAY_SECONDS = float(os.environ.get("HEDGE_DELAY_SECONDS", "1.5"))
+# Once an answer arrives, how long to wait for a more preferred provider that is still running
+PREFERENCE_WINDOW_SECONDS = float(os.environ.get("PREFERENCE_WINDOW_SECONDS", "0.3"))
+# Upper bound on one whole race
+HEDGE_TIMEOUT_SECONDS = float(os.environ.get("HEDGE_TIMEOUT_SECONDS", "25"))
+
+# Provider calls only do I/O and never wait on each other, so one shared pool is enough
+provider_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="provider")
+
+
+def hedged_call(providers, validate=bool, hedge_delay=None, preference_window=None, timeout=None,
+                executor=None):
+    """Race providers and return (name, result) for the best acceptable answer, or (None, None).
+
+    providers is a list of (name, callable) in preference order. The first one
+    starts right away; each next one starts hedge_delay seconds after the
+    previous (0 starts them all at once), or immediately once every running
+    provider has failed. A result counts when validate(result) is true and the
+    provider didn't raise. If a less preferred provider answers first, more
+    preferred ones still running get preference_window seconds to answer too.
+    Providers that haven't started are cancelled; ones already running are
+    left to finish in the background and their results are discarded.
+    """
+    hedge_delay = HEDGE_DELAY_SECONDS if hedge_delay is None else hedge_delay
+    preference_window = PREFERENCE_WINDOW_SECONDS if preference_window is None else preference_window
+    timeout = HEDGE_TIMEOUT_SECONDS if timeout is None else timeout
+    executor = executor or provider_executor
+
+    start = time.monotonic()
+    deadline = start + timeout
+    running = {}
+    finished = set()
+    accepted = {}
+    settle_by = None
+    next_start = start
+
+    def launch():
+        nonlocal next_start
+        index = len(running) + len(finished)
+        fn = providers[index][1]
+        running[executor.submit(fn)] = index
+        next_start = time.monotonic() + hedge_delay
+
+    try:
+        while True:
+            now = time.monotonic()
+            while (not accepted and len(running) + len(finished) < len(providers)
+                   and (now >= next_start or not running)):
+                launch()
+
+            if accepted:
+                best = min(accepted)
+                # Return once nothing more preferred can still answer, or the window has passed
+                if all(index in finished for index in range(best)) or now >= settle_by:
+                    name = providers[best][0]
+                    if best:
+                        logger.info(f"Hedged call settled on '{name}' after {now - start:.2f}s")
+                    return name, accepted[best]
+            if not running:
+                return None, None
+            if now >= deadline:
+                logger.warning(f"Hedged call timed out after {timeout}s")
+                return None, None
+
+            wake_at = deadline
+            if not accepted and len(running) + len(finished) < len(providers):
+                wake_at = min(wake_at, next_start)
+            if settle_by is not None:
+                wake_at = min(wake_at, settle_by)
+            done, _ = wait(list(running), timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                finished.add(index)
+                name = providers[index][0]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Provider '{name}' failed: {e}")
+                    continue
+                if validate(result):
+                    accepted[index] = result
+                    if settle_by is None:
+                        settle_by = time.monotonic() + preference_window
+                else:
+                    logger.info(f"Provider '{name}' returned no usable result")
+    finally:
+        for future in running:
+            future.cancel()
+
+
+async def async_hedged_call(providers, validate=bool, hedge_delay=None, preference_window=None, timeout=None):
+    """Asyncio version of hedged_call: providers are (name, coroutine function) pairs.
+
+    Same schedule and preference rules, but losing providers are really
+    cancelled, so their requests are abandoned as soon as the race is decided.
+    """
+    hedge_delay = HEDGE_DELAY_SECONDS if hedge_delay is None else hedge_delay
+    preference_window = PREFERENCE_WINDOW_SECONDS if preference_window is None else preference_window
+    timeout = HEDGE_TIMEOUT_SECONDS if timeout is None else timeout
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + timeout
+    running = {}
+    finished = set()
+    accepted = {}
+    settle_by = None
+    next_start = start
+
+    def launch():
+        nonlocal next_start
+        index = len(running) + len(finished)
+        running[asyncio.ensure_future(providers[index][1]())] = index
+        next_start = loop.time() + hedge_delay
+
+    try:
+        while True:
+            now = loop.time()
+            while (not accepted and len(running) + len(finished) < len(providers)
+                   and (now >= next_start or not running)):
+                launch()
+
+            if accepted:
+                best = min(accepted)
+                # Return once nothing more preferred can still answer, or the window has passed
+                if all(index in finished for index in range(best)) or now >= settle_by:
+                    name = providers[best][0]
+                    if best:
+                        logger.info(f"Hedged call settled on '{name}' after {now - start:.2f}s")
+                    return name, accepted[best]
+            if not running:
+                return None, None
+            if now >= deadline:
+                logger.warning(f"Hedged call timed out after {timeout}s")
+                return None, None
+
+            wake_at = deadline
+            if not accepted and len(running) + len(finished) < len(providers):
+                wake_at = min(wake_at, next_start)
+            if settle_by is not None:
+                wake_at = min(wake_at, settle_by)
+            done, _ = await asyncio.wait(list(running), timeout=max(0.0, wake_at - now),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = running.pop(task)
+                finished.add(index)
+                name = providers[index][0]
+                try:
+                    result = task.result()
+                except Exception as e:
+                    logger.error(f"Provider '{name}' failed: {e}")
+                    continue
+                if validate(result):
+                    accepted[index] = result
+                    if settle_by is None:
+                        settle_by = loop.time() + preference_window
+                else:
+                    logger.info(f"Provider '{name}' returned no usable result")
+    finally:
+        for task in running:
+            task.cancel()
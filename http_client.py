@@ -0,0 +1,155 @@
+import os
+import threading
+import logging
+from http.cookiejar import DefaultCookiePolicy
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Connect/read timeouts (seconds) for every outbound call that doesn't pass its own
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "10"))
+
+# Hosts whose pools are kept, and connections per host. The pools block: a thread
+# beyond HTTP_POOL_MAXSIZE waits (up to HTTP_POOL_TIMEOUT) for a free keep-alive
+# connection instead of opening a throwaway one that is closed when it's returned.
+HTTP_POOL_HOSTS = 16
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "10"))
+# How long (seconds) a request waits for a free pooled connection before failing.
+# The request timeout doesn't cover this wait, so without it a saturated pool could hang callers.
+HTTP_POOL_TIMEOUT = float(os.environ.get("HTTP_POOL_TIMEOUT", "5"))
+
+# Retries for connection failures and server errors, with exponential backoff.
+# 429 is not retried here: the provider circuit breakers (resilience.py) back off instead.
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = 0.3
+HTTP_RETRY_STATUSES = (500, 502, 503, 504)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+class PooledSession(requests.Session):
+    """requests.Session that applies the default (connect, read) timeouts to every request."""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        return super().request(method, url, **kwargs)
+
+
+class _BoundedWaitMixin:
+    # urllib3 waits forever for a connection from a blocking pool unless given a pool timeout
+    def _get_conn(self, timeout=None):
+        return super()._get_conn(timeout=HTTP_POOL_TIMEOUT if timeout is None else timeout)
+
+
+class _BoundedWaitHTTPConnectionPool(_BoundedWaitMixin, HTTPConnectionPool):
+    pass
+
+
+class _BoundedWaitHTTPSConnectionPool(_BoundedWaitMixin, HTTPSConnectionPool):
+    pass
+
+
+class BoundedPoolAdapter(HTTPAdapter):
+    """HTTPAdapter whose blocking pools wait at most HTTP_POOL_TIMEOUT for a free connection.
+
+    A request that can't get one raises requests.ConnectionError (not retried).
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _BoundedWaitHTTPConnectionPool,
+            "https": _BoundedWaitHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        try:
+            return super().send(request, **kwargs)
+        except EmptyPoolError as e:
+            raise requests.ConnectionError(f"No free connection to {request.url} after {HTTP_POOL_TIMEOUT}s",
+                                           request=request) from e
+
+
+def create_session():
+    """Build a keep-alive session with bounded, blocking per-host pools and retry-with-backoff."""
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        # Provider POSTs (Places searchText) are lookups, so retrying them is safe
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = BoundedPoolAdapter(
+        pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE, pool_block=True, max_retries=retry
+    )
+    session = PooledSession()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # Keep calls stateless like bare requests.get: never store or replay cookies
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_session():
+    """Return this process's shared session (recreated after a fork so workers never share sockets)."""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = create_session()
+            _session_pid = os.getpid()
+        return _session
+
+
+def http_get(url, **kwargs):
+    return get_session().get(url, **kwargs)
+
+
+def http_post(url, **kwargs):
+    return get_session().post(url, **kwargs)
+
+
+def connection_stats():
+    """Return per-host connection reuse counters for the pools currently held by this process."""
+    hosts = {}
+    session = get_session()
+    for adapter in dict.fromkeys(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            try:
+                pool = pools[key]
+            except KeyError:
+                # Evicted since keys() was taken
+                continue
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            stats = hosts.setdefault(host, {"requests": 0, "connections": 0})
+            stats["requests"] += pool.num_requests
+            stats["connections"] += pool.num_connections
+    total_requests = sum(stats["requests"] for stats in hosts.values())
+    total_connections = sum(stats["connections"] for stats in hosts.values())
+    for stats in hosts.values():
+        stats["reuse_rate"] = _reuse_rate(stats["requests"], stats["connections"])
+    return {
+        "hosts": hosts,
+        "requests": total_requests,
+        "connections": total_connections,
+        "reuse_rate": _reuse_rate(total_requests, total_connections),
+        "pool_maxsize": HTTP_POOL_MAXSIZE,
+        "pool_timeout": HTTP_POOL_TIMEOUT,
+        "timeouts": [HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT],
+    }
+
+
+def _reuse_rate(requests_made, connections):
+    # Share of requests that went out on an already open connection
+    if not requests_made:
+        return None
+    return round(max(0.0, 1 - connections / requests_made), 3)
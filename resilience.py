@@ -0,0 +1,175 @@
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses that mean the provider is throttling us, out of quota, or broken
+PROVIDER_FAILURE_STATUSES = {402, 403, 429}
+
+
+class ProviderUnavailable(Exception):
+    """Raised instead of calling a provider whose breaker is open or whose token bucket is empty."""
+
+
+# --- Token Bucket ---
+class TokenBucket:
+    """Client-side rate limit: rate tokens per second, holding at most capacity."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        # Caller holds self._lock
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available right now; never waits."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def stats(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return {"rate_per_second": self.rate, "capacity": self.capacity, "tokens": round(self._tokens, 2)}
+
+
+# --- Circuit Breaker ---
+class CircuitBreaker:
+    """Closed -> open after failure_threshold consecutive failures; half-open after reset_timeout.
+
+    While half-open a single probe call is let through: success closes the
+    breaker, failure opens it again for another reset_timeout.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._opened_count = 0
+        self._lock = threading.Lock()
+
+    def _current_state(self, now):
+        # Caller holds self._lock
+        if self._state == self.OPEN and now >= self._open_until:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self):
+        """Return True if a call may go out now (reserving the probe slot when half-open)."""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, open_for=None):
+        """Count a failure; open_for (e.g. a Retry-After) opens the breaker immediately for that long."""
+        with self._lock:
+            now = time.monotonic()
+            self._failures += 1
+            self._probe_in_flight = False
+            if (open_for is not None or self._state == self.HALF_OPEN
+                    or self._failures >= self.failure_threshold):
+                if self._state != self.OPEN:
+                    self._opened_count += 1
+                self._state = self.OPEN
+                self._open_until = now + max(open_for or 0, self.reset_timeout)
+
+    def release(self):
+        """Give back a half-open probe slot whose call ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "times_opened": self._opened_count,
+                "retry_in_seconds": round(self._open_until - now, 1) if state == self.OPEN else 0,
+            }
+
+
+# --- Provider Guard ---
+class ProviderGuard:
+    """Circuit breaker plus token bucket in front of one external provider."""
+
+    def __init__(self, name, rate, burst, failure_threshold, reset_timeout):
+        self.name = name
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.bucket = TokenBucket(rate, burst)
+        self._counts = {"calls": 0, "skipped_open": 0, "skipped_rate_limited": 0, "failures": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def before_call(self):
+        """Reserve a call or raise ProviderUnavailable so the caller can move on immediately."""
+        if not self.breaker.allow():
+            self._count("skipped_open")
+            raise ProviderUnavailable(f"{self.name} circuit is open")
+        if not self.bucket.try_acquire():
+            self.breaker.release()
+            self._count("skipped_rate_limited")
+            raise ProviderUnavailable(f"{self.name} client-side rate limit reached")
+        self._count("calls")
+
+    def record_response(self, status_code, headers=None, failed=False):
+        """Classify a provider response; failed=True marks a quota/error body on a 2xx response."""
+        if failed or status_code in PROVIDER_FAILURE_STATUSES or status_code >= 500:
+            retry_after = _retry_after_seconds(headers) if status_code == 429 else None
+            self.record_failure(open_for=retry_after)
+        else:
+            self.breaker.record_success()
+
+    def record_failure(self, open_for=None):
+        self._count("failures")
+        self.breaker.record_failure(open_for=open_for)
+        logger.warning(f"Provider '{self.name}' failed, breaker is {self.breaker.stats()['state']}")
+
+    def release(self):
+        self.breaker.release()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return {**self.breaker.stats(), **counts, "rate_limit": self.bucket.stats()}
+
+
+def _retry_after_seconds(headers):
+    try:
+        return float(headers.get("Retry-After")) if headers and headers.get("Retry-After") else None
+    except (TypeError, ValueError):
+        # HTTP-date form: fall back to the breaker's normal reset timeout
+        return None
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+import logging
+import weakref
+from storage import lock_fd, unlock_fd
+
+logger = logging.getLogger(__name__)
+
+# Where workers of one deployment meet: per-key lock files and the results they hand over
+SINGLE_FLIGHT_DIR = os.environ.get("SINGLE_FLIGHT_DIR", os.path.join(tempfile.gettempdir(), "reelbites-inflight"))
+# How long a finished result stays readable by workers that were waiting on the same key
+SINGLE_FLIGHT_RESULT_TTL_SECONDS = float(os.environ.get("SINGLE_FLIGHT_RESULT_TTL_SECONDS", "10"))
+# Stale result files are swept at most this often
+SINGLE_FLIGHT_SWEEP_INTERVAL_SECONDS = 60
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# --- Single Flight ---
+class SingleFlight:
+    """Run one call per key at a time and hand its result to every concurrent duplicate.
+
+    Inside a process, duplicates wait on the in-flight call. Across processes
+    (gunicorn/uvicorn workers) the leader of each process takes a per-key file
+    lock; the first to get it does the work and leaves the result in a file,
+    so the others read that result instead of repeating the work. Results are
+    only handed to other workers when shareable(result) is true, and only for
+    result_ttl seconds. Results must be JSON-serializable.
+    """
+
+    def __init__(self, directory, result_ttl, shareable=None):
+        self.directory = str(directory)
+        self.result_ttl = result_ttl
+        self.shareable = shareable or (lambda result: True)
+        self._calls = {}
+        self._tasks = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._stats = {"leaders": 0, "coalesced": 0, "shared_across_workers": 0}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def do(self, key, fn):
+        """Return fn() for key, or the result of an identical call already in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            self._count("coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run_locked(key, fn)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, coro_fn):
+        """Asyncio version of do: coro_fn is a coroutine function.
+
+        The work runs in its own task, so a caller that is cancelled (e.g. its
+        client went away) doesn't cancel it for everyone else waiting.
+        """
+        loop = asyncio.get_running_loop()
+        tasks = self._tasks.setdefault(loop, {})
+        task = tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run_locked_async(key, coro_fn))
+            tasks[key] = task
+            task.add_done_callback(lambda _: tasks.pop(key, None))
+        else:
+            self._count("coalesced")
+        return await asyncio.shield(task)
+
+    def _run_locked(self, key, fn):
+        fd = self._acquire(key)
+        try:
+            return self._lead(key, fn)
+        finally:
+            self._release(key, fd)
+
+    async def _run_locked_async(self, key, coro_fn):
+        fd = await asyncio.to_thread(self._acquire, key)
+        try:
+            shared = self._read_result(key)
+            if shared is not None:
+                return shared
+            self._count("leaders")
+            result = await coro_fn()
+            if self.shareable(result):
+                self._write_result(key, result)
+            return result
+        finally:
+            self._release(key, fd)
+
+    def _lead(self, key, fn):
+        # Caller holds the key's file lock
+        shared = self._read_result(key)
+        if shared is not None:
+            return shared
+        self._count("leaders")
+        result = fn()
+        if self.shareable(result):
+            self._write_result(key, result)
+        return result
+
+    def _path(self, key, suffix):
+        # Hashed so any key is a safe file name, even on case-insensitive filesystems
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + suffix)
+
+    def _acquire(self, key):
+        path = self._path(key, ".lock")
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                lock_fd(fd)
+            except BaseException:
+                os.close(fd)
+                raise
+            # The previous holder unlinks the file on release; a lock on an unlinked file guards nothing
+            try:
+                current = os.fstat(fd).st_ino == os.stat(path).st_ino
+            except FileNotFoundError:
+                current = False
+            if current:
+                return fd
+            unlock_fd(fd)
+            os.close(fd)
+
+    def _release(self, key, fd):
+        try:
+            os.unlink(self._path(key, ".lock"))
+        except OSError:
+            # Windows can't unlink an open file; the lock file is simply reused
+            pass
+        try:
+            unlock_fd(fd)
+        finally:
+            os.close(fd)
+
+    def _read_result(self, key):
+        path = self._path(key, ".json")
+        try:
+            if time.time() - os.path.getmtime(path) > self.result_ttl:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading single-flight result for '{key}': {e}")
+            return None
+        self._count("shared_across_workers")
+        return result
+
+    def _write_result(self, key, result):
+        path = self._path(key, ".json")
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error writing single-flight result for '{key}': {e}")
+        self._sweep()
+
+    def _sweep(self):
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < SINGLE_FLIGHT_SWEEP_INTERVAL_SECONDS:
+                return
+            self._last_sweep = now
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith((".json", ".tmp")) and now - entry.stat().st_mtime > max(self.result_ttl, 60):
+                    os.unlink(entry.path)
+        except OSError as e:
+            logger.warning(f"Could not sweep single-flight results: {e}")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, in_flight=len(self._calls))
+        stats["in_flight"] += sum(len(tasks) for tasks in list(self._tasks.values()))
+        return stats
@@ -0,0 +1,660 @@
+import json
+import base64
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import logging
+import re
+from pathlib import Path
+from urllib.parse import urlparse
+import numpy as np
+from geo import GeoGridIndex
+from columnar import ColumnarReels, open_columnar_snapshot, write_temp_columnar_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Number of journal records appended before the journal is folded into the snapshot
+JOURNAL_COMPACT_EVERY = int(os.environ.get("JOURNAL_COMPACT_EVERY", "500"))
+
+
+# Instagram post paths that carry a shortcode: /reel/<code>/, /reels/<code>/, /p/<code>/, /tv/<code>/
+INSTAGRAM_SHORTCODE_PATTERN = re.compile(r"^/(?:[\w.]+/)?(?:reels?|p|tv)/([A-Za-z0-9_-]+)")
+
+
+def canonical_reel_key(url):
+    """Return the Instagram shortcode for a reel/post URL, or None if it isn't one.
+
+    Tracking parameters such as igsh= and the /reel/ vs /p/ spelling don't
+    change the key, so it identifies a reel in the store and in every cache.
+    """
+    if not isinstance(url, str) or not url:
+        return None
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return None
+    host = parsed.netloc.lower().split(":")[0]
+    if not (host == "instagram.com" or host.endswith(".instagram.com") or host == "instagr.am"):
+        return None
+    match = INSTAGRAM_SHORTCODE_PATTERN.match(parsed.path)
+    return match.group(1) if match else None
+
+
+def reel_store_key(reel_data):
+    """Unique store key of a reel: its shortcode, or the stripped URL for non-Instagram links.
+
+    None for a record without a usable (non-empty string) instagram_url.
+    """
+    url = reel_data.get("instagram_url") if isinstance(reel_data, dict) else None
+    if not isinstance(url, str) or not url.strip():
+        return None
+    return canonical_reel_key(url) or url.strip()
+
+
+def valid_coordinates(location_data):
+    """True if location_data is a dict whose lat/lon are each None or a finite number."""
+    if not isinstance(location_data, dict):
+        return False
+    for field in ("lat", "lon"):
+        value = location_data.get(field)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            return False
+    return True
+
+
+def dedupe_reels(reels):
+    """Collapse repeated saves of the same reel: first position, latest data.
+
+    Records without a usable instagram_url are dropped (and logged), so one bad
+    save can't break loading or compaction.
+    """
+    positions = {}
+    unique = []
+    for reel in reels:
+        key = reel_store_key(reel)
+        if key is None:
+            logger.warning(f"Dropping reel record without a valid instagram_url: {reel!r:.200}")
+            continue
+        if key in positions:
+            unique[positions[key]] = reel
+        else:
+            positions[key] = len(unique)
+            unique.append(reel)
+    return unique
+
+
+def open_reel_store(backend, database_file, sqlite_file):
+    """Open the configured reel store ("json" journal or "sqlite")."""
+    if backend == "sqlite":
+        store = SQLiteStore(sqlite_file)
+        if store.count() == 0 and Path(database_file).exists():
+            store.import_json(database_file)
+        return store
+    if backend != "json":
+        raise ValueError(f"Unknown reel store backend: {backend}")
+    return JournalStore(database_file)
+
+
+# --- Cross-Process Locking ---
+if os.name == "nt":
+    import msvcrt
+
+    def lock_fd(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after ~10 seconds; keep waiting
+                continue
+
+    def unlock_fd(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def lock_fd(fd):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def unlock_fd(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class FileLock:
+    """Exclusive lock held across threads of this process and across processes (gunicorn workers)."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._thread_lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        try:
+            # A forked worker must not share its parent's open file description
+            if self._fd is None or self._pid != os.getpid():
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                self._pid = os.getpid()
+            lock_fd(self._fd)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        try:
+            unlock_fd(self._fd)
+        finally:
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+# --- Journal Storage ---
+class JournalStore:
+    """Append-only reel journal (one JSON record per line) with background compaction.
+
+    The snapshot keeps the original ``{"reels": [...]}`` layout of ``data.json``;
+    new reels are appended to ``<snapshot>.journal`` and periodically folded
+    into the snapshot by a background thread. Saving a reel that is already
+    stored (same reel_store_key) replaces it: reads keep only the latest record.
+
+    Every read and write holds ``<snapshot>.lock`` so several worker processes
+    can share the files; the snapshot is only ever replaced atomically.
+
+    Each compaction also writes ``<snapshot>.cols``, a columnar copy of the
+    snapshot (see columnar.py) that a cold ReelIndex maps instead of parsing
+    the JSON. It is only used while it matches the snapshot's stat signature.
+    """
+
+    def __init__(self, snapshot_path, compact_every=JOURNAL_COMPACT_EVERY):
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = self.snapshot_path.with_name(self.snapshot_path.name + ".journal")
+        self.compacting_path = self.snapshot_path.with_name(self.snapshot_path.name + ".journal.compacting")
+        self.columnar_path = self.snapshot_path.with_name(self.snapshot_path.name + ".cols")
+        self.compact_every = compact_every
+        self._lock = FileLock(self.snapshot_path.with_name(self.snapshot_path.name + ".lock"))
+        self._compaction_thread = None
+        self._pending = 0
+        self.initialize()
+
+    def initialize(self):
+        """Create the snapshot if needed and finish any interrupted compaction."""
+        with self._lock:
+            if not self.snapshot_path.exists():
+                os.replace(self._write_temp_snapshot([]), self.snapshot_path)
+            interrupted = self.compacting_path.exists()
+        if interrupted:
+            logger.info("Found unfinished journal compaction, finishing it now")
+            self._compact()
+        with self._lock:
+            self._pending = len(self._read_journal(self.journal_path))
+            stale = open_columnar_snapshot(self.columnar_path, _stat_signature(self.snapshot_path)) is None
+        if stale:
+            # Snapshot written before columnar copies existed (or edited by hand)
+            threading.Thread(target=self._rebuild_columnar, name="reel-columnar-rebuild", daemon=True).start()
+
+    def append(self, reel_data):
+        """Upsert one reel by appending it to the journal; cost does not depend on the number of stored reels."""
+        line = (json.dumps(reel_data, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            with open(self.journal_path, "a+b") as f:
+                # A crash mid-write can leave a torn last line; terminate it so
+                # the new record starts on its own line.
+                f.seek(0, os.SEEK_END)
+                if f.tell():
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending += 1
+            if self._pending >= self.compact_every:
+                self._start_compaction()
+
+    def load(self):
+        """Return every stored reel, snapshot first and then journal order."""
+        with self._lock:
+            reels = self._read_snapshot()
+            reels.extend(self._read_journal(self.compacting_path))
+            reels.extend(self._read_journal(self.journal_path))
+        return dedupe_reels(reels)
+
+    def changes_since(self, token):
+        """Return (reset, reels, token) describing what changed since token.
+
+        The token records the snapshot's stat signature and how far the journal
+        has been read. Appends are returned incrementally; a compaction (new
+        snapshot) or an unknown token returns everything with reset=True.
+        """
+        with self._lock:
+            snapshot_sig = _stat_signature(self.snapshot_path)
+            journal_ino = _inode(self.journal_path)
+            if token is not None and token[0] == snapshot_sig:
+                _, last_ino, offset = token
+                if last_ino == journal_ino:
+                    reels, offset = self._read_journal_from(self.journal_path, offset)
+                    return False, reels, (snapshot_sig, journal_ino, offset)
+                if last_ino is not None and last_ino == _inode(self.compacting_path):
+                    # The journal we were reading was rotated out for compaction
+                    reels, _ = self._read_journal_from(self.compacting_path, offset)
+                    new_reels, offset = self._read_journal_from(self.journal_path, 0)
+                    reels.extend(new_reels)
+                    return False, reels, (snapshot_sig, journal_ino, offset)
+                if last_ino is None and not self.compacting_path.exists():
+                    reels, offset = self._read_journal_from(self.journal_path, 0)
+                    return False, reels, (snapshot_sig, journal_ino, offset)
+
+            pending = self._read_journal(self.compacting_path)
+            new_reels, offset = self._read_journal_from(self.journal_path, 0)
+            pending.extend(new_reels)
+            token = (snapshot_sig, journal_ino, offset)
+            columnar = open_columnar_snapshot(self.columnar_path, snapshot_sig)
+            if columnar is not None:
+                return True, ColumnarReels(columnar, pending), token
+            reels = self._read_snapshot()
+            reels.extend(pending)
+            return True, dedupe_reels(reels), token
+
+    def compact(self, wait=False):
+        """Fold the current journal into the snapshot."""
+        with self._lock:
+            self._start_compaction()
+            thread = self._compaction_thread
+        if wait and thread:
+            thread.join()
+
+    def _start_compaction(self):
+        # Caller holds self._lock
+        if self._compaction_thread and self._compaction_thread.is_alive():
+            return
+        if not self.compacting_path.exists():
+            if not self.journal_path.exists():
+                return
+            os.replace(self.journal_path, self.compacting_path)
+            self._pending = 0
+        self._compaction_thread = threading.Thread(
+            target=self._compact, name="reel-journal-compaction", daemon=True
+        )
+        self._compaction_thread.start()
+
+    def _compact(self):
+        tmp_path = None
+        columnar_tmp_path = None
+        try:
+            # Build the new snapshot without holding the lock; the swap below only
+            # happens if no other process compacted these files in the meantime
+            snapshot_sig = _stat_signature(self.snapshot_path)
+            compacting_ino = _inode(self.compacting_path)
+            if compacting_ino is None:
+                return
+            reels = self._read_snapshot()
+            reels.extend(self._read_journal(self.compacting_path))
+            reels = dedupe_reels(reels)
+            tmp_path = self._write_temp_snapshot(reels)
+            # os.replace keeps inode, mtime and size, so this is the signature the snapshot will have
+            columnar_tmp_path = self._write_temp_columnar(reels, _stat_signature(tmp_path))
+            with self._lock:
+                if (_stat_signature(self.snapshot_path) != snapshot_sig
+                        or _inode(self.compacting_path) != compacting_ino):
+                    logger.info("Journal was compacted by another worker, discarding this compaction")
+                    return
+                os.replace(tmp_path, self.snapshot_path)
+                tmp_path = None
+                self.compacting_path.unlink()
+                if columnar_tmp_path is not None:
+                    columnar_tmp_path = self._replace_columnar(columnar_tmp_path)
+            logger.info(f"Compacted reel journal into snapshot ({len(reels)} reels)")
+        except Exception as e:
+            logger.error(f"Error compacting reel journal: {e}")
+        finally:
+            for path in (tmp_path, columnar_tmp_path):
+                if path is not None:
+                    Path(path).unlink(missing_ok=True)
+
+    def _rebuild_columnar(self):
+        """Regenerate the columnar copy of the current snapshot (best effort)."""
+        columnar_tmp_path = None
+        try:
+            with self._lock:
+                snapshot_sig = _stat_signature(self.snapshot_path)
+                reels = dedupe_reels(self._read_snapshot())
+            columnar_tmp_path = self._write_temp_columnar(reels, snapshot_sig)
+            with self._lock:
+                if columnar_tmp_path is not None and _stat_signature(self.snapshot_path) == snapshot_sig:
+                    columnar_tmp_path = self._replace_columnar(columnar_tmp_path)
+        except Exception as e:
+            logger.error(f"Error rebuilding columnar reel snapshot: {e}")
+        finally:
+            if columnar_tmp_path is not None:
+                Path(columnar_tmp_path).unlink(missing_ok=True)
+
+    def _write_temp_columnar(self, reels, snapshot_sig):
+        # The columnar copy is an optimization: failing to write it never fails a compaction
+        try:
+            keys = [reel_store_key(reel) for reel in reels]
+            return write_temp_columnar_snapshot(self.columnar_path, reels, keys, snapshot_sig)
+        except Exception as e:
+            logger.error(f"Error writing columnar reel snapshot: {e}")
+            return None
+
+    def _replace_columnar(self, tmp_path):
+        # Caller holds self._lock; returns the temp path if it still needs cleaning up
+        try:
+            os.replace(tmp_path, self.columnar_path)
+            return None
+        except PermissionError as e:
+            # Windows refuses to replace a file another process has mapped; readers fall back to JSON
+            logger.warning(f"Could not replace columnar reel snapshot: {e}")
+            return tmp_path
+
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return []
+        reels = data.get("reels", []) if isinstance(data, dict) else []
+        return [reel for reel in reels if isinstance(reel, dict)]
+
+    def _read_journal(self, path):
+        return self._read_journal_from(path, 0)[0]
+
+    def _read_journal_from(self, path, offset):
+        """Read complete records from byte offset; return them with the offset just past the last one."""
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                raw = f.read()
+        except FileNotFoundError:
+            return [], offset
+        # Leave a trailing partial line for the next read
+        end = raw.rfind(b"\n") + 1
+        reels = []
+        for line in raw[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                reels.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping torn journal record in {path}")
+        return reels, offset + end
+
+    def _write_temp_snapshot(self, reels):
+        # Unique name per writer so concurrent compactions never share a temp file
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.snapshot_path.parent, prefix=self.snapshot_path.name + ".", suffix=".tmp"
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"reels": reels}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        return tmp_path
+
+
+# --- SQLite Storage ---
+class SQLiteStore:
+    """SQLite reel store in WAL mode, so readers are never blocked by a save."""
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        self.initialize()
+
+    def _connect(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def initialize(self):
+        """Create the reels table and its indexes, migrating older tables to keyed upserts."""
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS reels (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    reel_key TEXT,
+                    instagram_url TEXT NOT NULL,
+                    lat REAL,
+                    lon REAL,
+                    timestamp TEXT,
+                    data TEXT NOT NULL,
+                    seq INTEGER
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(reels)")}
+            if "reel_key" not in columns:
+                self._migrate_to_reel_keys(conn)
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_reels_reel_key ON reels (reel_key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reels_seq ON reels (seq)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reels_lat_lon ON reels (lat, lon)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reels_lon ON reels (lon)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reels_timestamp ON reels (timestamp)")
+
+    def _migrate_to_reel_keys(self, conn):
+        # Tables created before reels were keyed by shortcode: backfill keys and
+        # change sequence numbers, then keep only the latest row per key
+        logger.info(f"Migrating {self.db_path} to unique reel keys")
+        conn.execute("ALTER TABLE reels ADD COLUMN reel_key TEXT")
+        conn.execute("ALTER TABLE reels ADD COLUMN seq INTEGER")
+        rows = conn.execute("SELECT id, data FROM reels").fetchall()
+        conn.executemany(
+            "UPDATE reels SET reel_key = ?, seq = id WHERE id = ?",
+            [(reel_store_key(json.loads(data)), row_id) for row_id, data in rows],
+        )
+        conn.execute("""
+            DELETE FROM reels WHERE id NOT IN (SELECT MAX(id) FROM reels GROUP BY reel_key)
+        """)
+
+    def append(self, reel_data):
+        """Upsert one reel by its reel_store_key."""
+        conn = self._connect()
+        with conn:
+            conn.execute(UPSERT_REEL_SQL, _reel_row(reel_data))
+
+    def load(self):
+        """Return every stored reel in insertion order."""
+        rows = self._connect().execute("SELECT data FROM reels ORDER BY id")
+        return [json.loads(data) for (data,) in rows]
+
+    def changes_since(self, token):
+        """Return (reset, reels, token); the token is the highest change sequence number already seen."""
+        conn = self._connect()
+        if token is None:
+            last_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM reels").fetchone()[0]
+            rows = conn.execute("SELECT data FROM reels WHERE seq <= ? ORDER BY id", (last_seq,)).fetchall()
+            return True, [json.loads(data) for (data,) in rows], last_seq
+        rows = conn.execute("SELECT seq, data FROM reels WHERE seq > ? ORDER BY seq", (token,)).fetchall()
+        reels = [json.loads(data) for _, data in rows]
+        return False, reels, rows[-1][0] if rows else token
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM reels").fetchone()[0]
+
+    def import_json(self, json_path):
+        """One-shot import of an existing data.json ({"reels": [...]}) and its journal."""
+        reels = JournalStore(json_path).load()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                UPSERT_REEL_SQL, [_reel_row(reel) for reel in reels if reel.get("instagram_url")]
+            )
+        logger.info(f"Imported {len(reels)} reels from {json_path} into {self.db_path}")
+        return len(reels)
+
+
+UPSERT_REEL_SQL = """
+    INSERT INTO reels (reel_key, instagram_url, lat, lon, timestamp, data, seq)
+    VALUES (?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM reels))
+    ON CONFLICT (reel_key) DO UPDATE SET
+        instagram_url = excluded.instagram_url,
+        lat = excluded.lat,
+        lon = excluded.lon,
+        timestamp = excluded.timestamp,
+        data = excluded.data,
+        seq = excluded.seq
+"""
+
+
+def _reel_row(reel_data):
+    loc_data = reel_data.get("location_data") or {}
+    return (
+        reel_store_key(reel_data),
+        reel_data["instagram_url"],
+        loc_data.get("lat"),
+        loc_data.get("lon"),
+        reel_data.get("timestamp"),
+        json.dumps(reel_data, ensure_ascii=False),
+    )
+
+
+def _stat_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _inode(path):
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+# --- Resident Index ---
+class ReelIndex:
+    """Resident in-memory copy of a reel store with a spatial index over reel coordinates.
+
+    Reads only ask the store what changed since the last refresh (a couple of
+    stat calls for the journal store, an indexed id range for SQLite), so
+    queries are answered from memory.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.reels = []
+        self._positions = {}
+        self.geo = GeoGridIndex()
+        self._token = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Pull new reels from the store; reload everything if the store was rewritten."""
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        # Caller holds self._lock
+        reset, reels, token = self.store.changes_since(self._token)
+        if reset:
+            self.geo.clear()
+            if isinstance(reels, ColumnarReels):
+                # Index the mapped coordinate columns directly; reel dicts are only built when read
+                self.reels = reels
+                self._positions = None
+                self.geo.add_many(np.arange(reels.snapshot.count), reels.snapshot.lats, reels.snapshot.lons)
+                reels = reels.pending
+            else:
+                self.reels = []
+                self._positions = {}
+        for reel in reels:
+            try:
+                self._add(reel)
+            except Exception as e:
+                # One bad record must not keep every later reel out of the index
+                logger.warning(f"Skipping malformed reel record {reel!r:.200}: {e}")
+        # Only advance once the batch is applied, so a failed refresh is retried from the same point
+        self._token = token
+        return self.reels
+
+    @property
+    def positions(self):
+        """Map of reel_store_key to position in self.reels (built on first use after a columnar load)."""
+        if self._positions is None:
+            self._positions = self.reels.key_positions()
+        return self._positions
+
+    def _add(self, reel):
+        key = reel_store_key(reel)
+        if key is None or not valid_coordinates(reel.get("location_data") or {}):
+            raise ValueError("reel has no valid instagram_url or non-numeric coordinates")
+        position = self.positions.get(key)
+        if position is None:
+            # New reel: append
+            position = self.positions[key] = len(self.reels)
+            self.reels.append(reel)
+        else:
+            # Re-saved reel: replace in place so positions stay stable
+            self.reels[position] = reel
+            self.geo.remove(position)
+        loc_data = reel.get("location_data")
+        if loc_data and loc_data.get("lat") is not None and loc_data.get("lon") is not None:
+            self.geo.add(position, loc_data["lat"], loc_data["lon"])
+
+    def get(self, url):
+        """Return the stored reel for a URL (any tracking parameters), or None."""
+        with self._lock:
+            self._refresh()
+            position = self.positions.get(canonical_reel_key(url) or url.strip())
+            return self.reels[position] if position is not None else None
+
+    def within(self, lat, lon, radius_km):
+        """Return (distance_km, reel) pairs for reels within radius_km of a point, closest first."""
+        with self._lock:
+            reels = self._refresh()
+            return [(distance, reels[position]) for distance, position in self.geo.within(lat, lon, radius_km)]
+
+    def page(self, lat, lon, radius_km, limit, cursor=None):
+        """Return one page of reels within radius_km, closest first, and the cursor for the next page.
+
+        Raises InvalidCursor for a malformed cursor. The next cursor is None on the last page.
+        """
+        after = _decode_cursor(cursor) if cursor else None
+        with self._lock:
+            reels = self._refresh()
+            matches = self.geo.within(lat, lon, radius_km, limit=limit + 1, after=after)
+        next_cursor = _encode_cursor(*matches[limit - 1]) if len(matches) > limit else None
+        return [(distance, reels[position]) for distance, position in matches[:limit]], next_cursor
+
+    def nearest(self, lat, lon, k=1):
+        """Return the k reels closest to a point as (distance_km, reel) pairs, closest first."""
+        with self._lock:
+            reels = self._refresh()
+            return [(distance, reels[position]) for distance, position in self.geo.nearest(lat, lon, k)]
+
+
+class InvalidCursor(ValueError):
+    """A page cursor that wasn't produced by ReelIndex.page."""
+
+
+def _encode_cursor(distance, position):
+    raw = json.dumps([distance, position]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    try:
+        distance, position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(distance), int(position)
+    except Exception:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
@@ -0,0 +1,95 @@
+"""Concurrency stress test for the reel stores.
+
+Starts N worker processes that all save reels into the same store at once
+(with frequent journal compaction for the JSON backend) while this process
+keeps refreshing a resident ReelIndex, then checks that every record
+survived exactly once, the index saw all of them and the snapshot is still
+valid JSON. Run it for both backends after changing storage.py (locking,
+journal compaction, the columnar snapshot or ReelIndex refreshes).
+
+Usage: python stress_concurrent_saves.py [--backend json|sqlite] [--workers 8] [--reels 200]
+Exits with status 1 if a worker crashed or any record was lost, duplicated or not indexed.
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+from storage import JournalStore, SQLiteStore, ReelIndex
+
+
+def open_store(backend, directory, compact_every):
+    if backend == "sqlite":
+        return SQLiteStore(Path(directory) / "reels.db")
+    return JournalStore(Path(directory) / "data.json", compact_every=compact_every)
+
+
+def worker(backend, directory, worker_id, count, compact_every, start_event):
+    store = open_store(backend, directory, compact_every)
+    start_event.wait()
+    for i in range(count):
+        store.append({
+            "instagram_url": f"https://www.instagram.com/reel/W{worker_id}R{i}/",
+            "location_data": {"lat": 10.0 + worker_id * 0.01, "lon": 76.3 + i * 0.0001},
+            "timestamp": time.time(),
+        })
+    if backend == "json":
+        store.compact(wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--reels", type=int, default=200, help="reels saved by each worker")
+    parser.add_argument("--compact-every", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        open_store(args.backend, directory, args.compact_every)
+        start_event = multiprocessing.Event()
+        processes = [
+            multiprocessing.Process(
+                target=worker,
+                args=(args.backend, directory, worker_id, args.reels, args.compact_every, start_event),
+            )
+            for worker_id in range(args.workers)
+        ]
+        for process in processes:
+            process.start()
+        index = ReelIndex(open_store(args.backend, directory, args.compact_every))
+        started = time.perf_counter()
+        start_event.set()
+        while any(process.is_alive() for process in processes):
+            index.refresh()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        failed = [p.pid for p in processes if p.exitcode != 0]
+        store = open_store(args.backend, directory, args.compact_every)
+        reels = store.load()
+        expected = {f"https://www.instagram.com/reel/W{w}R{i}/" for w in range(args.workers) for i in range(args.reels)}
+        stored = [reel["instagram_url"] for reel in reels]
+        missing = expected - set(stored)
+        duplicates = len(stored) - len(set(stored))
+        indexed = {reel["instagram_url"] for reel in index.refresh()}
+        not_indexed = expected - indexed
+
+        if args.backend == "json":
+            # The snapshot must parse on its own
+            json.loads((Path(directory) / "data.json").read_text(encoding="utf-8"))
+
+        print(f"{args.backend}: {args.workers} workers x {args.reels} saves in {elapsed:.2f}s "
+              f"-> {len(stored)} stored, {len(indexed)} indexed, {len(missing)} missing, {duplicates} duplicates, "
+              f"{len(not_indexed)} not indexed")
+        if failed or missing or duplicates or indexed != expected:
+            print(f"FAILED (crashed workers: {failed})")
+            sys.exit(1)
+        print("OK")
+
+
+if __name__ == "__main__":
+    main()
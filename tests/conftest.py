@@ -0,0 +1,34 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+
+class _NoEntities:
+    ents = []
+
+
+@pytest.fixture(scope="session")
+def reelbites(tmp_path_factory):
+    """The Flask app module, imported inside a scratch copy of data.json and its own caches."""
+    directory = tmp_path_factory.mktemp("app")
+    shutil.copy(REPO_DIR / "data.json", directory)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(directory)
+        patch.setenv("LOOKUP_CACHE_FILE", str(directory / "lookup_cache.db"))
+        patch.setenv("SINGLE_FLIGHT_DIR", str(directory / "inflight"))
+        import spacy
+        if not spacy.util.is_package("en_core_web_sm"):
+            # The model is a separate download; these tests never look at entities
+            patch.setattr(spacy, "load", lambda name: (lambda text: _NoEntities()))
+        import app
+        yield app
+
+
+@pytest.fixture
+def client(reelbites):
+    return reelbites.app.test_client()
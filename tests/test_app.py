@@ -0,0 +1,15 @@
+def test_save_location_rejects_non_string_url(reelbites, client):
+    before = len(reelbites.reel_store.load())
+    for url in (12345, "", "  ", None, ["https://www.instagram.com/reel/A/"]):
+        response = client.post("/save_location", json={"instagram_url": url, "location_data": {"lat": 10.0, "lon": 76.3}})
+        assert response.status_code == 400
+    reelbites.reel_store.compact(wait=True)
+    assert len(reelbites.reel_store.load()) == before
+    assert len(reelbites.ReelIndex(reelbites.reel_store).refresh()) == before
+
+
+def test_save_location_rejects_non_numeric_coordinates(client):
+    response = client.post("/save_location", json={
+        "instagram_url": "https://www.instagram.com/reel/BADLAT/", "location_data": {"lat": "10.0", "lon": 76.3},
+    })
+    assert response.status_code == 400
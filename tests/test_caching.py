@@ -0,0 +1,37 @@
+import caching
+from caching import PersistentTTLCache
+
+
+def disk_keys(cache):
+    rows = cache._connect().execute("SELECT key FROM cache_entries WHERE namespace = ?", (cache.namespace,))
+    return {key for (key,) in rows}
+
+
+def test_memory_hits_keep_a_key_from_being_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(caching, "EVICT_CHECK_EVERY", 1)
+    cache = PersistentTTLCache(tmp_path / "cache.db", "test", 3600, max_entries=5)
+    cache.set("hot", "value")
+    for i in range(20):
+        assert cache.get("hot") == "value"
+        assert cache.stats()["memory_hits"] == i + 1
+        cache.set(f"cold{i}", i)
+
+    assert "hot" in disk_keys(cache)
+    assert len(disk_keys(cache)) == 5
+    # A worker that never saw the key in memory still finds it on disk
+    assert PersistentTTLCache(tmp_path / "cache.db", "test", 3600, max_entries=5).get("hot") == "value"
+
+
+def test_recency_is_flushed_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(caching, "RECENCY_FLUSH_EVERY", 3)
+    cache = PersistentTTLCache(tmp_path / "cache.db", "test", 3600, max_entries=100)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    last_used = lambda: dict(cache._connect().execute("SELECT key, last_used FROM cache_entries"))
+    before = last_used()
+    cache.get("a")
+    cache.get("b")
+    assert last_used() == before
+    cache.get("c")
+    after = last_used()
+    assert all(after[key] > before[key] for key in ("a", "b", "c"))
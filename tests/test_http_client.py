@@ -0,0 +1,47 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+import http_client
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(1)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slow_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_saturated_pool_fails_fast_instead_of_hanging(slow_server, monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_POOL_MAXSIZE", 1)
+    monkeypatch.setattr(http_client, "HTTP_POOL_TIMEOUT", 0.2)
+    session = http_client.create_session()
+    holder = threading.Thread(target=lambda: session.get(slow_server).close())
+    holder.start()
+    time.sleep(0.2)  # let the holder take the only connection
+
+    started = time.perf_counter()
+    with pytest.raises(requests.ConnectionError):
+        session.get(slow_server)
+    assert time.perf_counter() - started < 0.8
+    holder.join()
+    # Once the connection is returned the pool serves requests again
+    assert session.get(slow_server).text == "ok"
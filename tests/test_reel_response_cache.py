@@ -0,0 +1,51 @@
+import time
+import pytest
+from caching import PersistentTTLCache
+
+URL = "https://www.instagram.com/reel/SWRTEST/"
+
+
+@pytest.fixture
+def refreshes(reelbites, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(reelbites.reel_refresh_executor, "submit", lambda *args: submitted.append(args))
+    return submitted
+
+
+def other_worker_cache(reelbites):
+    cache = reelbites.reel_response_cache
+    return PersistentTTLCache(cache.db_path, cache.namespace, cache.ttl_seconds, cache.max_entries)
+
+
+def entry(answer, fresh_for):
+    return {"payload": {"answer": answer}, "status": 200, "fresh_until": time.time() + fresh_for}
+
+
+def test_stale_memory_copy_rereads_a_row_another_worker_refreshed(reelbites, refreshes):
+    key = reelbites.reel_flight_key(URL)
+    reelbites.reel_response_cache.set(key, entry("old", -1))
+    other_worker_cache(reelbites).set(key, entry("new", 3600))
+
+    assert reelbites.cached_reel_response(URL, key) == ({"answer": "new"}, 200)
+    assert refreshes == []
+
+
+def test_stale_row_is_refreshed_once(reelbites, refreshes):
+    key = reelbites.reel_flight_key(URL)
+    reelbites.reel_response_cache.set(key, entry("old", -1))
+    reelbites.reel_refreshes.clear()
+
+    assert reelbites.cached_reel_response(URL, key) == ({"answer": "old"}, 200)
+    assert reelbites.cached_reel_response(URL, key) == ({"answer": "old"}, 200)
+    assert len(refreshes) == 1
+    reelbites.reel_refreshes.clear()
+
+
+def test_queued_refresh_skips_a_row_another_worker_refreshed(reelbites, monkeypatch):
+    key = reelbites.reel_flight_key(URL)
+    stale = entry("old", -1)
+    other_worker_cache(reelbites).set(key, entry("new", 3600))
+    monkeypatch.setattr(reelbites, "resolve_reel", lambda url: pytest.fail("resolved a fresh reel again"))
+
+    reelbites.refresh_reel_response(URL, key, stale)
+    assert reelbites.reel_response_cache.get(key)["payload"] == {"answer": "new"}
@@ -0,0 +1,52 @@
+import json
+from storage import JournalStore, SQLiteStore, ReelIndex, dedupe_reels, reel_store_key
+
+
+def reel(url, lat=10.0, lon=76.3):
+    return {"instagram_url": url, "location_data": {"lat": lat, "lon": lon}}
+
+
+def test_reel_store_key_ignores_non_string_urls():
+    assert reel_store_key({"instagram_url": 12345}) is None
+    assert reel_store_key({"instagram_url": "   "}) is None
+    assert reel_store_key({}) is None
+    assert reel_store_key(reel("https://www.instagram.com/reel/ABC/?igsh=x")) == "ABC"
+
+
+def test_dedupe_drops_records_without_a_url():
+    reels = [reel("https://www.instagram.com/reel/A/"), reel(12345), reel(None), reel("https://www.instagram.com/p/A/")]
+    assert dedupe_reels(reels) == [reels[3]]
+
+
+def test_journaled_non_string_url_survives_compaction_and_reload(tmp_path):
+    store = JournalStore(tmp_path / "data.json")
+    store.append(reel("https://www.instagram.com/reel/GOOD1/"))
+    store.append(reel(12345))
+    store.append(reel("https://www.instagram.com/reel/GOOD2/", lat=10.1))
+    store.compact(wait=True)
+
+    assert not store.compacting_path.exists()
+    snapshot = json.loads((tmp_path / "data.json").read_text(encoding="utf-8"))
+    assert [r["instagram_url"] for r in snapshot["reels"]] == [
+        "https://www.instagram.com/reel/GOOD1/", "https://www.instagram.com/reel/GOOD2/",
+    ]
+    reloaded = JournalStore(tmp_path / "data.json")
+    assert len(reloaded.load()) == 2
+    index = ReelIndex(reloaded)
+    assert len(index.refresh()) == 2
+    assert index.get("https://www.instagram.com/reel/GOOD2/") is not None
+
+
+def test_sqlite_import_skips_non_string_urls(tmp_path):
+    journal = JournalStore(tmp_path / "data.json")
+    journal.append(reel(12345))
+    journal.append(reel("https://www.instagram.com/reel/GOOD1/"))
+    store = SQLiteStore(tmp_path / "reels.db")
+    store.import_json(tmp_path / "data.json")
+    assert [r["instagram_url"] for r in store.load()] == ["https://www.instagram.com/reel/GOOD1/"]
+
+
+def test_sqlite_store_indexes_coordinates(tmp_path):
+    store = SQLiteStore(tmp_path / "reels.db")
+    indexes = {name for (name,) in store._connect().execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_reels_lat_lon", "idx_reels_lon", "idx_reels_timestamp"} <= indexes